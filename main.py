@@ -1,17 +1,35 @@
+import time
+_STARTED = time.perf_counter()  # Reference point of the startup profile
+
+import os
+import sys
+from datetime import date, datetime
+from modules.address_book_registry import AddressBookRegistry
+from modules.backup_manager import BackupManager
 from modules.contact_manager import ContactManager
+from modules.contact_diff import format_diff
+from modules.query import FIELD_GETTERS, OPERATORS
+from modules.sync import sync
 import utils.helper_functions as hf
 
+_IMPORTED = time.perf_counter()
+
+DEFAULT_BOOK = "contacts"  # The address book stored in contacts.json
 
-def display_menu():
+
+def display_menu(book_name=None):
     """
     Displays the main menu with options for the Contact Management System.
     
     This function prints out the available options for the user to interact
     with the system, including adding, viewing, updating, deleting,
-    and backing up contacts.
+    and backing up contacts. The name of the current address book is shown
+    if given.
     """
     print("\n\033[1;36m" + "=" * 40)
     print("     CONTACT MANAGEMENT SYSTEM")
+    if book_name:
+        print(f"     Address book: {book_name}")
     print("=" * 40)
     print("\033[1;36m1)\033[0m Add Contact ")
     print("\033[1;36m2)\033[0m Show Contacts")
@@ -20,6 +38,14 @@ def display_menu():
     print("\033[1;36m5)\033[0m Search Contact")
     print("\033[1;36m6)\033[0m Backup Contact")
     print("\033[1;36m7)\033[0m Restore Backup")
+    print("\033[1;36m8)\033[0m Import Contacts")
+    print("\033[1;36m9)\033[0m Point-in-Time Restore")
+    print("\033[1;36m10)\033[0m Verify Backups")
+    print("\033[1;36m11)\033[0m Upcoming Birthdays")
+    print("\033[1;36m12)\033[0m Advanced Search")
+    print("\033[1;36m13)\033[0m Undo / Redo")
+    print("\033[1;36m14)\033[0m Switch Address Book")
+    print("\033[1;36m15)\033[0m Sync With Another Database")
     print("\033[1;91m0) Exit\033[0m ")
     print("\033[1;36m" + "=" * 40 + "\033[0m")
 
@@ -109,7 +135,7 @@ def search_and_select_contact(contact_manager, name):
     elif len(found_contacts) > 1:
         print("\nMultiple contacts found:")
         for i, contact in enumerate(found_contacts, start=1):
-            print(f"\033[1;36m{i})\033[0m {contact.name} - {', '.join([hf.format_phone_number(phone) for phone in contact.phones])}")
+            print(f"\033[1;36m{i})\033[0m {contact.name} - {', '.join(contact.phones.formatted())}")
             
         # Allow user to select the correct contact
         try:
@@ -136,7 +162,7 @@ def show_contact_details(contact):
     """
     # Show current contact details
     # for i, contact in enumerate(found_contacts, start=1):
-    phones_str = ", ".join([hf.format_phone_number(phone) for phone in contact.phones])
+    phones_str = ", ".join(contact.phones.formatted())
     print(f"{'-'*40}")
     print(f"Name:      {contact.name.title()}")
     print(f"Phones:    {phones_str}")
@@ -288,7 +314,7 @@ def delete_contact_process(contact_manager):
     elif len(found_contacts) > 1:
         print("\nMultiple contacts found:")
         for i, contact in enumerate(found_contacts, start=1):
-            print(f"\033[1;36m{i})\033[0m {contact.name} - {', '.join([hf.format_phone_number(phone) for phone in contact.phones])}")
+            print(f"\033[1;36m{i})\033[0m {contact.name} - {', '.join(contact.phones.formatted())}")
             
         # Prompt the user to choose the correct contact
         # Use try-except to handle invalid input when selecting a contact
@@ -338,23 +364,29 @@ def search_contact_process(contact_manager):
         hf.show_error_message("No search term entered. Please enter a name.")
         return
     
-    # Search for contacts matching the entered name
-    results = contact_manager.search_contact(search_term)
-    
-    # If results are found, display them
-    if results:
-        hf.show_info_message(f"Found {len(results)} contact(s):")
-        for contact in results:
-            phones_str = ", ".join([hf.format_phone_number(phone) for phone in contact.phones])
-            print(f"{'-'*40}")
-            print(f"Name:      {contact.name.title()}")
-            print(f"Phones:    {phones_str}")
-            print(f"Email:     {contact.email if contact.email else '-'}")
-            print(f"Address:   {contact.address if contact.address else '-'}")
-            print(f"Birthday:  {contact.birthday if contact.birthday else '-'}")
-            print(f"{'-'*40}\n")
+    # Stream the matching contacts page by page, so the first results show
+    # up immediately and only one page is held in memory
+    page_size = 20
+    shown = 0
+    for contact in contact_manager.iter_search(search_term):
+        phones_str = ", ".join(contact.phones.formatted())
+        print(f"{'-'*40}")
+        print(f"Name:      {contact.name.title()}")
+        print(f"Phones:    {phones_str}")
+        print(f"Email:     {contact.email if contact.email else '-'}")
+        print(f"Address:   {contact.address if contact.address else '-'}")
+        print(f"Birthday:  {contact.birthday if contact.birthday else '-'}")
+        print(f"{'-'*40}\n")
+        shown += 1
+        
+        if shown % page_size == 0:
+            more = input(f"Press Enter for more results or '0' to stop: ").strip()
+            if more == "0":
+                break
     
     # If no results are found, show an error message   
+    if shown:
+        hf.show_info_message(f"Shown {shown} contact(s) matching '{search_term}'.")
     else:
         hf.show_error_message(f"No contacts found matching '{search_term}'.")
 
@@ -376,6 +408,7 @@ def restore_backup(contact_manager):
     # Show title for the restore backup process
     hf.show_title("restore backup")
     # Get a list of recent backups (default: last 3)
+    contact_manager.wait_for_backups()  # Include backups still being written
     recent_backups = contact_manager.backup_manager.list_recent_backups(n=3)
     
     # Inform user if no backups are found
@@ -404,14 +437,473 @@ def restore_backup(contact_manager):
             
             backup_filename = recent_backups[choice - 1]
             
-            contact_manager.restore_backup(backup_filename)
+            restore_backup_options(contact_manager, backup_filename)
         else:
             hf.show_error_message("Invalid selection.\n")
     except ValueError:
         hf.show_error_message("Invalid input. Please enter a number.\n")
 
 
-def main():
+def restore_backup_options(contact_manager, backup_filename):
+    """
+    Lets the user preview the changes of a backup and restore all or only
+    selected contacts from it.
+    
+    Parameters:
+    -----------
+    contact_manager : ContactManager
+        The instance of the ContactManager class that manages contacts.
+    backup_filename : str
+        The name of the chosen backup file.
+    
+    Returns:
+    --------
+    None
+    """
+    while True:
+        print(f"\n\033[1;34m1)\033[0m Preview changes of '{backup_filename}'")
+        print("\033[1;34m2)\033[0m Restore all contacts")
+        print("\033[1;34m3)\033[0m Restore selected contacts\n")
+        option = input("Please choose an option or '0' to cancel: ").strip()
+        
+        if option == "1":  # Show what a restore would change
+            diff = contact_manager.diff_backup(backup_filename)
+            if diff is None:
+                return
+            lines = format_diff(diff)
+            if not lines:
+                hf.show_info_message("The backup is identical to the current contacts.")
+            else:
+                hf.show_info_message(
+                    f"{len(diff['added'])} added, {len(diff['removed'])} removed, "
+                    f"{len(diff['modified'])} modified:"
+                )
+                print("\n".join(lines))
+        
+        elif option == "2":  # Replace the whole contact list
+            contact_manager.restore_backup(backup_filename)
+            return
+        
+        elif option == "3":  # Restore only the chosen contacts
+            names = input("Enter the names to restore, separated by commas: ").strip()
+            if hf.check_cancel(names, "Backup restoration") or not names:
+                return
+            contact_manager.restore_selected_contacts(backup_filename, names.split(","))
+            return
+        
+        elif option == "0":
+            hf.show_info_message("Returning to the main menu.\n")
+            return
+        else:
+            hf.show_warning_message("Invalid choice. Please select '1', '2', '3', or '0' to cancel.")
+
+
+def point_in_time_restore_process(contact_manager):
+    """
+    Handles the process of restoring the contacts as they were at a given time.
+    
+    Parameters:
+    -----------
+    contact_manager : ContactManager
+        The instance of the ContactManager class that manages contacts.
+    
+    Returns:
+    --------
+    None
+    """
+    hf.clear_terminal()
+    # Show title for the point-in-time restore process
+    hf.show_title("point-in-time restore")
+    
+    # Prompt the user for the point in time
+    value = input("Enter date and time (DD.MM.YYYY HH:MM[:SS]) or '0' to Exit: ").strip()
+    
+    # Check if the user wants to cancel the process
+    if hf.check_cancel(value, "Backup restoration"):
+        return
+    
+    for time_format in ("%d.%m.%Y %H:%M:%S", "%d.%m.%Y %H:%M"):
+        try:
+            timestamp = datetime.strptime(value, time_format)
+            break
+        except ValueError:
+            continue
+    else:
+        hf.show_error_message("Invalid date. Please use the format DD.MM.YYYY HH:MM.")
+        return
+    
+    contact_manager.restore_point_in_time(timestamp)
+
+
+def verify_backups_process(contact_manager):
+    """
+    Verifies all backups and shows which ones are corrupt or truncated.
+    
+    Parameters:
+    -----------
+    contact_manager : ContactManager
+        The instance of the ContactManager class that manages contacts.
+    
+    Returns:
+    --------
+    None
+    """
+    hf.clear_terminal()
+    # Show title for the verification process
+    hf.show_title("verify backups")
+    
+    contact_manager.wait_for_backups()  # Include backups still being written
+    results = contact_manager.backup_manager.verify_backups()
+    if not results:
+        hf.show_info_message("No backups available.")
+        return
+    
+    for result in results:
+        if result["ok"]:
+            print(f"\033[0;92mOK\033[0m      {result['name']} ({result['contacts']} contact(s))")
+        else:
+            print(f"\033[0;91mFAILED\033[0m  {result['name']}: {result['error']}")
+    
+    failed = sum(1 for result in results if not result["ok"])
+    if failed:
+        hf.show_error_message(f"\n{failed} of {len(results)} backup(s) failed verification.")
+    else:
+        hf.show_success_message(f"\nAll {len(results)} backup(s) verified successfully.")
+
+
+def upcoming_birthdays_process(contact_manager):
+    """
+    Shows the contacts with a birthday in the next days.
+    
+    Parameters:
+    -----------
+    contact_manager : ContactManager
+        The instance of the ContactManager class that manages contacts.
+    
+    Returns:
+    --------
+    None
+    """
+    hf.clear_terminal()
+    # Show title for the upcoming birthdays
+    hf.show_title("upcoming birthdays")
+    
+    value = input("Show birthdays in the next how many days? (default 14): ").strip()
+    if hf.check_cancel(value, "birthday search"):
+        return
+    
+    if not value:
+        days = 14
+    elif value.isdigit():
+        days = int(value)
+    else:
+        hf.show_error_message("Invalid input. Please enter a number.")
+        return
+    
+    results = contact_manager.upcoming_birthdays(days)
+    if not results:
+        hf.show_info_message(f"No birthdays in the next {days} day(s).")
+        return
+    
+    today = date.today()
+    hf.show_info_message(f"Found {len(results)} birthday(s):")
+    for birthday, contact in results:
+        remaining = (birthday - today).days
+        when = "today" if remaining == 0 else f"in {remaining} day(s)"
+        print(f"\033[1;36m{birthday.strftime('%d.%m.')}\033[0m  {contact.name.title():<25} {when}")
+
+
+def advanced_search_process(contact_manager):
+    """
+    Handles the process of searching contacts by several fields at once.
+    
+    Parameters:
+    -----------
+    contact_manager : ContactManager
+        The instance of the ContactManager class that manages contacts.
+    
+    Returns:
+    --------
+    None
+    """
+    hf.clear_terminal()
+    # Show title for the advanced search
+    hf.show_title("advanced search")
+    
+    print(f"Fields:    {', '.join(FIELD_GETTERS)}")
+    print(f"Operators: {', '.join(OPERATORS)}")
+    print("Example:   email_domain = company.de AND city = neuss AND phone_count > 1\n")
+    
+    query = input("Enter query or '0' to Exit: ").strip()
+    if hf.check_cancel(query, "search"):
+        return
+    if not query:
+        hf.show_error_message("No query entered.")
+        return
+    
+    try:
+        plan = contact_manager.explain_query(query)
+        results = contact_manager.query(query)
+    except ValueError as e:
+        hf.show_error_message(f"Error: {str(e)}")
+        return
+    
+    print(f"\033[0;90mPlan: {plan}\033[0m\n")
+    if not results:
+        hf.show_error_message("No contacts found matching the query.")
+        return
+    
+    hf.show_info_message(f"Found {len(results)} contact(s):")
+    for contact in results:
+        show_contact_details(contact)
+
+
+def undo_redo_process(contact_manager):
+    """
+    Undoes the last change or redoes the last undone change.
+    
+    Parameters:
+    -----------
+    contact_manager : ContactManager
+        The instance of the ContactManager class that manages contacts.
+    
+    Returns:
+    --------
+    None
+    """
+    hf.clear_terminal()
+    # Show title for the undo/redo process
+    hf.show_title("undo / redo")
+    
+    undo_label = contact_manager.undo_stack.peek_undo()
+    redo_label = contact_manager.undo_stack.peek_redo()
+    if undo_label is None and redo_label is None:
+        hf.show_info_message("Nothing to undo or redo.")
+        return
+    
+    print(f"u) Undo: {undo_label or '-'}")
+    print(f"r) Redo: {redo_label or '-'}")
+    choice = input("\nPlease choose u, r or 'cancel': ").lower().strip()
+    if hf.check_cancel(choice, "undo/redo"):
+        return
+    
+    if choice == "u" and undo_label is not None:
+        contact_manager.undo()
+        hf.show_success_message(f"Undone: {undo_label}")
+    elif choice == "r" and redo_label is not None:
+        contact_manager.redo()
+        hf.show_success_message(f"Redone: {redo_label}")
+    else:
+        hf.show_warning_message("Invalid choice.")
+
+
+def switch_address_book_process(registry, current_name):
+    """
+    Lets the user choose another address book (or create a new one).
+    
+    Parameters:
+    -----------
+    registry : AddressBookRegistry
+        The registry managing the address books.
+    current_name : str
+        The name of the current address book.
+    
+    Returns:
+    --------
+    str
+        The name of the chosen address book (the current one if cancelled).
+    """
+    hf.clear_terminal()
+    # Show title for switching the address book
+    hf.show_title("switch address book")
+    
+    for name in registry.list_books():
+        marker = "*" if name == current_name else " "
+        state = "loaded" if name in registry else ""
+        print(f"{marker} {name:<30} {state}")
+    
+    name = input("\nEnter the name of the address book (a new name creates one) or 'cancel': ").strip()
+    if hf.check_cancel(name, "switch") or not name:
+        return current_name
+    
+    try:
+        registry.get(name)
+    except ValueError as e:
+        hf.show_error_message(f"Error: {str(e)}")
+        return current_name
+    
+    hf.show_success_message(f"Switched to address book '{name}'.")
+    return name
+
+
+def sync_process(contact_manager):
+    """
+    Synchronizes the contacts in both directions with another database,
+    e.g. a copy of the contact manager in another directory.
+    
+    Parameters:
+    -----------
+    contact_manager : ContactManager
+        The instance of the ContactManager class that manages contacts.
+    
+    Returns:
+    --------
+    None
+    """
+    hf.clear_terminal()
+    # Show title for the sync process
+    hf.show_title("sync")
+    
+    path = input("Enter the directory or contacts file to sync with or '0' to Exit: ").strip()
+    if hf.check_cancel(path, "sync"):
+        return
+    
+    if os.path.isdir(path):
+        db_name = os.path.join(path, "contacts.json")
+    else:
+        db_name = path
+    if not os.path.isfile(db_name):
+        hf.show_error_message(f"Error: The file '{db_name}' was not found.")
+        return
+    if os.path.abspath(db_name) == os.path.abspath(contact_manager.db_name):
+        hf.show_error_message("Error: A database can't be synced with itself.")
+        return
+    
+    other = ContactManager(
+        db_name=db_name,
+        backup_folder=os.path.join(os.path.dirname(db_name), "backups/")
+    )
+    received, sent = sync(contact_manager, other)
+    hf.show_success_message(
+        f"Sync finished: {received} change(s) received, {sent} change(s) sent."
+    )
+
+
+def import_contacts_process(contact_manager):
+    """
+    Handles the process of importing contacts from a vCard or CSV file.
+    
+    Parameters:
+    -----------
+    contact_manager : ContactManager
+        The instance of the ContactManager class that manages contacts.
+    
+    Returns:
+    --------
+    None
+    """
+    hf.clear_terminal()
+    # Show title for the import process
+    hf.show_title("import contacts")
+    
+    # Prompt the user for the file to import
+    file_name = input("Enter the path of a .vcf or .csv file or '0' to Exit: ").strip()
+    
+    # Check if the user wants to cancel the process
+    if hf.check_cancel(file_name, "import"):
+        return
+    
+    if not file_name:
+        hf.show_error_message("No file entered. Please enter a file path.")
+        return
+    
+    hf.show_info_message(f"Importing contacts from '{file_name}'...")
+    contact_manager.import_contacts_from_file(file_name)
+
+
+def open_registry():
+    """
+    Returns the address book registry used by main(). The original
+    contacts.json and backups/ form the default address book.
+    """
+    registry = AddressBookRegistry(lazy_load=True, background_backups=True)
+    registry.register(DEFAULT_BOOK, "contacts.json", "backups/")
+    return registry
+
+
+def startup_profile():
+    """
+    Measures how long each startup phase takes and prints a report.
+
+    The phases are the module imports, opening the default address book the
+    way main() does, drawing the first menu and the rest of the background
+    loading of the contacts.
+    """
+    phases = [("Imports", _IMPORTED - _STARTED)]
+
+    start = time.perf_counter()
+    registry = open_registry()
+    contact_manager = registry.get(DEFAULT_BOOK)
+    phases.append(("Address book setup", time.perf_counter() - start))
+
+    start = time.perf_counter()
+    hf.clear_terminal()
+    display_menu()
+    phases.append(("First menu draw", time.perf_counter() - start))
+    menu_ready = time.perf_counter() - _STARTED
+
+    start = time.perf_counter()
+    contact_manager.wait_until_loaded()
+    phases.append(("Background loading (after menu)", time.perf_counter() - start))
+    loaded = time.perf_counter() - _STARTED
+
+    hf.show_title("Startup profile")
+    for phase, seconds in phases:
+        print(f"{phase:<34} {seconds * 1000:>9.1f} ms")
+    print("-" * 47)
+    print(f"{'Menu shown after':<34} {menu_ready * 1000:>9.1f} ms")
+    print(f"{'Contacts loaded after':<34} {loaded * 1000:>9.1f} ms")
+    print(f"{'Contacts':<34} {len(contact_manager.contacts):>9}")
+    registry.close()
+
+
+def migrate_backups(backup_folder):
+    """
+    Moves the loose backup files of a folder into its packed backup archive.
+    Afterwards the folder holds a single file, 'backups.pack'.
+    
+    Parameters:
+    -----------
+    backup_folder : str
+        The backup folder to migrate.
+    """
+    if not os.path.isdir(backup_folder):
+        hf.show_error_message(f"Error: Backup folder '{backup_folder}' not found.")
+        return
+    try:
+        backup_manager = BackupManager(backup_folder)
+        migrated = backup_manager.migrate_to_archive()
+    except (OSError, ValueError) as e:
+        hf.show_error_message(f"Error: Migration failed: {str(e)}")
+        return
+    hf.show_success_message(
+        f"{migrated} backup(s) migrated to '{backup_manager.archive.path}'."
+    )
+
+
+def dedupe_backups(backup_folder):
+    """
+    Registers the loose backup files of a folder that are missing from its
+    manifest (e.g. backups of older versions) and replaces identical files
+    by hard links to a single blob.
+
+    Parameters:
+    -----------
+    backup_folder : str
+        The backup folder to deduplicate.
+    """
+    if not os.path.isdir(backup_folder):
+        hf.show_error_message(f"Error: Backup folder '{backup_folder}' not found.")
+        return
+    try:
+        registered = BackupManager(backup_folder).deduplicate_backups()
+    except OSError as e:
+        hf.show_error_message(f"Error: Deduplication failed: {str(e)}")
+        return
+    hf.show_success_message(f"{registered} backup(s) deduplicated in '{backup_folder}'.")
+
+
+def main(argv=None):
     """
     Main function to run the Contact Manager system.
     
@@ -419,16 +911,39 @@ def main():
     user. The user can choose different actions (add, show, update, delete,
     search, backup, restore) by selecting the corresponding menu option.
     The system runs in a loop until the user chooses to exit.
+
+    The contacts are loaded in the background, so the menu appears
+    immediately. With '--startup-profile' the startup phases are measured
+    and reported instead. '--migrate-backups [FOLDER]' moves the loose
+    backup files into a packed archive, and '--dedupe-backups [FOLDER]'
+    stores identical loose backup files only once.
     """
-    # Initialize the ContactManager instance
-    contact_manager = ContactManager()
+    argv = sys.argv[1:] if argv is None else argv
+    if "--startup-profile" in argv:
+        startup_profile()
+        return
+    if "--migrate-backups" in argv:
+        position = argv.index("--migrate-backups")
+        folder = argv[position + 1] if position + 1 < len(argv) else "backups/"
+        migrate_backups(folder)
+        return
+    if "--dedupe-backups" in argv:
+        position = argv.index("--dedupe-backups")
+        folder = argv[position + 1] if position + 1 < len(argv) else "backups/"
+        dedupe_backups(folder)
+        return
+
+    registry = open_registry()
+    book_name = DEFAULT_BOOK
     hf.clear_terminal()
     
     while True:
-        display_menu()  # Display the menu options
+        # Get the ContactManager of the current book (cheap if it is loaded)
+        contact_manager = registry.get(book_name)
+        display_menu(book_name)  # Display the menu options
         
         # Get user's input
-        choice = input("Please choose an option (1-7) or 0 to Exit: ")
+        choice = input("Please choose an option (1-15) or 0 to Exit: ")
         
         # Handle the user's choice
         if choice == "1":
@@ -442,14 +957,31 @@ def main():
         elif choice == "5":
             search_contact_process(contact_manager)
         elif choice == "6":
-            contact_manager.backup_manager.create_backup(contact_manager.db_name)
+            contact_manager.create_backup()
         elif choice == "7":
             restore_backup(contact_manager)
+        elif choice == "8":
+            import_contacts_process(contact_manager)
+        elif choice == "9":
+            point_in_time_restore_process(contact_manager)
+        elif choice == "10":
+            verify_backups_process(contact_manager)
+        elif choice == "11":
+            upcoming_birthdays_process(contact_manager)
+        elif choice == "12":
+            advanced_search_process(contact_manager)
+        elif choice == "13":
+            undo_redo_process(contact_manager)
+        elif choice == "14":
+            book_name = switch_address_book_process(registry, book_name)
+        elif choice == "15":
+            sync_process(contact_manager)
         elif choice == "0" or choice.lower() in ["exit"]:
+            registry.close()  # Write pending changes of all loaded books
             hf.show_info_message("Thank you for using our service. See you soon!\n")
             break
         else:
-            hf.show_warning_message("Invalid choice. Please select a valid option (1-7) or 0 to Exit.\n")
+            hf.show_warning_message("Invalid choice. Please select a valid option (1-15) or 0 to Exit.\n")
 
 
 if __name__ == "__main__":
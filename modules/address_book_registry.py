@@ -0,0 +1,188 @@
+"""
+This module defines the AddressBookRegistry class, which manages many named
+address books, each with its own database file and backup folder. Books are
+loaded on demand and kept in an LRU cache that is bounded by the number of
+books and, optionally, by their estimated memory. The least recently used
+book is closed (flushed, with its backup worker stopped) and unloaded when
+the cache is full.
+"""
+
+import os
+import re
+from collections import OrderedDict
+from modules.contact_manager import ContactManager
+
+
+# Loaded contacts (objects, cached JSON and indexes) take roughly this many
+# times the size of their JSON file in memory
+MEMORY_PER_FILE_BYTE = 6
+
+_BOOK_NAME = re.compile(r"^[\w-]+$")
+
+
+class AddressBookRegistry:
+    """
+    A registry of named address books with an LRU cache of loaded books.
+
+    Attributes:
+    -----------
+    folder : str            | The directory of books without registered paths.
+    max_books : int         | The maximum number of loaded books.
+    max_bytes : int or None | The maximum estimated memory of the loaded books.
+    hits : int              | Number of get() calls answered from the cache.
+    misses : int            | Number of get() calls that loaded a book.
+    """
+    def __init__(self, folder="address_books", max_books=4, max_bytes=None, **manager_options):
+        """
+        Initialize the registry.
+
+        Parameters:
+        -----------
+        folder : str, optional
+            The directory in which new books are created (default is "address_books").
+            A book "team" is stored as 'team.json' with backups in 'team_backups/'.
+        max_books : int, optional
+            The maximum number of books kept loaded (default is 4).
+        max_bytes : int, optional
+            The maximum estimated memory of the loaded books (default is no limit).
+        **manager_options : dict
+            Passed to every ContactManager (e.g. lazy_load=True).
+        """
+        self.folder = folder
+        self.max_books = max(1, max_books)
+        self.max_bytes = max_bytes
+        self.manager_options = manager_options
+        self.hits = 0
+        self.misses = 0
+        self._paths = {}  # Registered (db_name, backup_folder) by book name
+        self._loaded = OrderedDict()  # ContactManager by book name, least recently used first
+
+    def register(self, name, db_name, backup_folder):
+        """
+        Registers a book stored outside the registry folder, e.g. the original
+        'contacts.json' with its 'backups/' folder.
+        """
+        self._validate_name(name)
+        self._paths[name] = (db_name, backup_folder)
+
+    def _validate_name(self, name):
+        """
+        Raises:
+        -------
+        ValueError
+            If the name can't be used as a file name.
+        """
+        if not isinstance(name, str) or not _BOOK_NAME.match(name):
+            raise ValueError(
+                f"Invalid address book name '{name}'. Use letters, digits, '_' and '-'."
+            )
+
+    def paths(self, name):
+        """Returns the (db_name, backup_folder) of a book."""
+        self._validate_name(name)
+        if name in self._paths:
+            return self._paths[name]
+        return (
+            os.path.join(self.folder, f"{name}.json"),
+            os.path.join(self.folder, f"{name}_backups/")
+        )
+
+    def list_books(self):
+        """Returns the names of all registered and stored books, sorted."""
+        names = set(self._paths) | set(self._loaded)
+        if os.path.isdir(self.folder):
+            for file_name in os.listdir(self.folder):
+                stem, extension = os.path.splitext(file_name)
+                # Skip the synchronization state files next to the books
+                if extension == ".json" and _BOOK_NAME.match(stem) and not stem.endswith("_sync"):
+                    names.add(stem)
+        return sorted(names)
+
+    def loaded_books(self):
+        """Returns the names of the loaded books, most recently used last."""
+        return list(self._loaded)
+
+    def __contains__(self, name):
+        """True if the book is loaded."""
+        return name in self._loaded
+
+    def get(self, name):
+        """
+        Returns the ContactManager of a book, loading it if needed.
+        A book that doesn't exist yet is created on its first save.
+
+        Parameters:
+        -----------
+        name : str
+            The name of the book.
+
+        Returns:
+        --------
+        ContactManager
+
+        Raises:
+        -------
+        ValueError
+            If the name is invalid.
+        """
+        manager = self._loaded.get(name)
+        if manager is not None:
+            self.hits += 1
+            self._loaded.move_to_end(name)
+            return manager
+
+        self.misses += 1
+        db_name, backup_folder = self.paths(name)
+        folder = os.path.dirname(db_name)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        manager = ContactManager(db_name=db_name, backup_folder=backup_folder, **self.manager_options)
+        self._loaded[name] = manager
+        self._evict(keep=name)
+        return manager
+
+    def estimated_bytes(self, name=None):
+        """
+        Estimates the memory of one loaded book, or of all loaded books,
+        from the size of their database files.
+        """
+        names = [name] if name is not None else list(self._loaded)
+        total = 0
+        for book in names:
+            db_name = self._loaded[book].db_name
+            if os.path.isfile(db_name):
+                total += os.path.getsize(db_name) * MEMORY_PER_FILE_BYTE
+        return total
+
+    def _evict(self, keep=None):
+        """Unloads least recently used books until the cache is within its limits."""
+        while len(self._loaded) > 1:
+            too_many = len(self._loaded) > self.max_books
+            too_large = self.max_bytes is not None and self.estimated_bytes() > self.max_bytes
+            if not (too_many or too_large):
+                break
+            oldest = next(iter(self._loaded))
+            if oldest == keep:
+                break
+            self.unload(oldest)
+
+    def unload(self, name):
+        """
+        Writes pending changes of a book, stops its backup worker and removes
+        it from the cache.
+
+        Returns:
+        --------
+        bool
+            True if the book was loaded.
+        """
+        manager = self._loaded.pop(name, None)
+        if manager is None:
+            return False
+        manager.close()
+        return True
+
+    def close(self):
+        """Closes and unloads all books."""
+        for name in list(self._loaded):
+            self.unload(name)
@@ -0,0 +1,67 @@
+"""
+This module splits free-form addresses such as "Kirchstr.9, 41450 Neuss" into
+street, postal code and city. Parsing is best effort: unknown formats keep the
+whole text as street and leave the other components empty.
+"""
+
+import re
+
+
+# "41450 Neuss" (DE/AT/CH/FR style postal code before the city)
+_POSTAL_CITY = re.compile(r"^(?P<postal_code>\d{4,5})\s+(?P<city>\D.*)$")
+# "Kirchstr.9 41450 Neuss" (no comma between street and postal code)
+_STREET_POSTAL_CITY = re.compile(r"^(?P<street>.*\S)\s+(?P<postal_code>\d{4,5})\s+(?P<city>\D.*)$")
+# "Springfield, IL 62704" or "Springfield 62704" (postal code after the city)
+_CITY_POSTAL = re.compile(r"^(?P<city>\D+?)\s+(?:[A-Z]{2}\s+)?(?P<postal_code>\d{5})(?:-\d{4})?$")
+# "IL 62704" (US state and ZIP code; the city is the previous segment)
+_STATE_POSTAL = re.compile(r"^[A-Z]{2}\s+(?P<postal_code>\d{5})(?:-\d{4})?$")
+
+
+def parse_address(address):
+    """
+    Splits an address into its components.
+
+    Parameters:
+    -----------
+    address : str
+        The address, e.g. "Kirchstr.9, 41450 Neuss" or "meisenweg 12a, 65235 Hofheim".
+
+    Returns:
+    --------
+    dict
+        "street", "postal_code" and "city" (empty strings if unknown).
+    """
+    parts = {"street": "", "postal_code": "", "city": ""}
+    if not address or not address.strip():
+        return parts
+
+    segments = [segment.strip() for segment in address.split(",") if segment.strip()]
+
+    # Find the segment holding the postal code and the city
+    for position, segment in enumerate(segments):
+        match = _STATE_POSTAL.match(segment)
+        if match and position > 0:
+            parts["postal_code"] = match.group("postal_code")
+            parts["city"] = segments[position - 1]
+            parts["street"] = ", ".join(segments[:position - 1])
+            return parts
+
+        match = _POSTAL_CITY.match(segment) or _CITY_POSTAL.match(segment)
+        if match:
+            parts["postal_code"] = match.group("postal_code")
+            parts["city"] = match.group("city").strip()
+            parts["street"] = ", ".join(segments[:position])
+            return parts
+
+        match = _STREET_POSTAL_CITY.match(segment)
+        if match:
+            parts.update({key: value.strip() for key, value in match.groupdict().items()})
+            return parts
+
+    # No postal code: "street, city" or just a street
+    if len(segments) > 1 and not any(char.isdigit() for char in segments[-1]):
+        parts["street"] = ", ".join(segments[:-1])
+        parts["city"] = segments[-1]
+    else:
+        parts["street"] = ", ".join(segments)
+    return parts
@@ -0,0 +1,277 @@
+"""
+This module defines the BackupArchive class, which stores many backup
+snapshots in a single packed file instead of one file per backup.
+
+Layout of the archive file:
+
+    header    b"CBAKPACK1\\n"
+    members   the snapshot contents, one after another
+    index     JSON: {"backups": [{"name", "timestamp", "sha256", "offset", "length"}]}
+    footer    index offset and length (8 bytes each, big-endian) and b"CBAKIDX1"
+
+The fixed-size footer at the end of the file leads to the index, and the
+index leads to any member, so listing or reading a snapshot takes one open
+and a few seeks. Snapshots with identical content share one member.
+
+Adding snapshots never overwrites anything: the new members, index and
+footer are appended after the current footer, so an interrupted write leaves
+the previous index usable. Superseded indexes are dropped when the archive
+is compacted.
+"""
+
+import json
+import os
+import struct
+
+
+HEADER = b"CBAKPACK1\n"
+FOOTER_MAGIC = b"CBAKIDX1"
+_FOOTER = struct.Struct(">QQ8s")
+
+
+class BackupArchive:
+    """
+    A packed, indexed archive of backup snapshots.
+
+    Attributes:
+    -----------
+    path : str  | The path of the archive file.
+    """
+    def __init__(self, path):
+        """
+        Initialize the archive. The file is created with the first snapshot.
+
+        Parameters:
+        -----------
+        path : str
+            The path of the archive file.
+        """
+        self.path = path
+
+    def exists(self):
+        """True if the archive file exists."""
+        return os.path.isfile(self.path)
+
+    def _read_index(self, file):
+        """
+        Reads the index through the footer of an open archive.
+
+        If the file doesn't end with a valid footer (a write was interrupted),
+        the last complete index before the unfinished tail is used.
+
+        Returns:
+        --------
+        tuple
+            (index entries, end of the footer of that index).
+
+        Raises:
+        -------
+        ValueError
+            If the file is not a valid archive.
+        """
+        file.seek(0, os.SEEK_END)
+        size = file.tell()
+        if size < len(HEADER) + _FOOTER.size:
+            raise ValueError(f"'{self.path}' is too short to be a backup archive.")
+
+        entries = self._index_before(file, size)
+        if entries is not None:
+            return entries, size
+
+        # Look for the last complete footer before an unfinished tail
+        file.seek(0)
+        content = file.read()
+        position = content.rfind(FOOTER_MAGIC)
+        while position >= len(HEADER):
+            end = position + len(FOOTER_MAGIC)
+            entries = self._index_before(file, end)
+            if entries is not None:
+                return entries, end
+            position = content.rfind(FOOTER_MAGIC, 0, position)
+        raise ValueError(f"'{self.path}' has no valid index (truncated archive?).")
+
+    def _index_before(self, file, end):
+        """Returns the index of the footer ending at offset 'end', or None if it is not valid."""
+        file.seek(end - _FOOTER.size)
+        index_offset, index_length, magic = _FOOTER.unpack(file.read(_FOOTER.size))
+        if magic != FOOTER_MAGIC or index_offset + index_length + _FOOTER.size != end:
+            return None
+        file.seek(index_offset)
+        try:
+            return json.loads(file.read(index_length).decode("utf-8"))["backups"]
+        except (UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError):
+            return None
+
+    def entries(self):
+        """
+        Returns the index entries ("name", "timestamp", "sha256", "offset",
+        "length") in the order the snapshots were added.
+
+        Raises:
+        -------
+        ValueError
+            If the file is not a valid archive.
+        """
+        if not self.exists():
+            return []
+        with open(self.path, "rb") as file:
+            return self._read_index(file)[0]
+
+    def names(self):
+        """Returns the snapshot names in the order they were added."""
+        return [entry["name"] for entry in self.entries()]
+
+    def read(self, name):
+        """
+        Returns the content of a snapshot, or None if there is no such snapshot.
+
+        Raises:
+        -------
+        ValueError
+            If the file is not a valid archive.
+        """
+        if not self.exists():
+            return None
+        with open(self.path, "rb") as file:
+            entries, _ = self._read_index(file)
+            for entry in entries:
+                if entry["name"] == name:
+                    file.seek(entry["offset"])
+                    return file.read(entry["length"])
+        return None
+
+    def read_all(self):
+        """
+        Yields (entry, content) for every snapshot, reading the archive once.
+
+        Raises:
+        -------
+        ValueError
+            If the file is not a valid archive.
+        """
+        if not self.exists():
+            return
+        with open(self.path, "rb") as file:
+            entries, _ = self._read_index(file)
+            for entry in entries:
+                file.seek(entry["offset"])
+                yield entry, file.read(entry["length"])
+
+    def append(self, snapshots):
+        """
+        Adds snapshots to the archive.
+
+        The new members and the new index are written after the current
+        footer and synced to disk before the new footer is written, so the
+        current index stays valid until the new one is complete. A failed
+        write is cut off again. When superseded indexes take up more than
+        half of the file, the archive is compacted.
+
+        Parameters:
+        -----------
+        snapshots : iterable
+            (name, timestamp, sha256, content) tuples. The timestamp is an
+            ISO string or None.
+
+        Raises:
+        -------
+        ValueError
+            If a name is already in the archive or the file is not a valid archive.
+        """
+        created = not self.exists()
+        with open(self.path, "w+b" if created else "r+b") as file:
+            if created:
+                file.write(HEADER)
+                entries = []
+            else:
+                entries, _ = self._read_index(file)
+            start = file.seek(0, os.SEEK_END)
+
+            try:
+                entries = self._append_members(file, entries, snapshots, start)
+                index = json.dumps({"backups": entries}).encode("utf-8")
+                index_offset = file.tell()
+                file.write(index)
+                file.flush()
+                os.fsync(file.fileno())
+
+                # Only now switch to the new index
+                file.write(_FOOTER.pack(index_offset, len(index), FOOTER_MAGIC))
+                file.flush()
+                os.fsync(file.fileno())
+            except BaseException:
+                file.truncate(start)
+                if created:
+                    file.close()
+                    os.remove(self.path)
+                raise
+            size = file.tell()
+
+        live = len(HEADER) + len(index) + _FOOTER.size + sum(
+            entry["length"] for entry in {entry["offset"]: entry for entry in entries}.values()
+        )
+        if size > 2 * live:
+            self.compact()
+
+    def _append_members(self, file, entries, snapshots, end):
+        """
+        Writes the content of new snapshots at offset 'end' (content that is
+        already in the archive is not written again).
+
+        Returns:
+        --------
+        list
+            The index entries including the new snapshots.
+        """
+        entries = list(entries)
+        names = {entry["name"] for entry in entries}
+        members = {entry["sha256"]: entry for entry in entries}
+        file.seek(end)
+        for name, timestamp, sha256, content in snapshots:
+            if name in names:
+                raise ValueError(f"Backup '{name}' is already in the archive.")
+            names.add(name)
+
+            member = members.get(sha256)
+            if member is None:
+                # New content: append it as a member
+                file.write(content)
+                member = {"offset": end, "length": len(content)}
+                end += len(content)
+            entry = {
+                "name": name,
+                "timestamp": timestamp,
+                "sha256": sha256,
+                "offset": member["offset"],
+                "length": member["length"],
+            }
+            entries.append(entry)
+            members.setdefault(sha256, entry)
+        return entries
+
+    def compact(self):
+        """
+        Rewrites the archive without superseded indexes and unfinished tails.
+        The new archive is written to a temporary file and swapped in, so the
+        old archive stays intact until the new one is complete.
+        """
+        tmp_path = self.path + ".tmp"
+        with open(self.path, "rb") as source:
+            entries, _ = self._read_index(source)
+            with open(tmp_path, "wb") as file:
+                file.write(HEADER)
+                offsets = {}  # New offset by old offset
+                compacted = []
+                for entry in entries:
+                    if entry["offset"] not in offsets:
+                        source.seek(entry["offset"])
+                        offsets[entry["offset"]] = file.tell()
+                        file.write(source.read(entry["length"]))
+                    compacted.append(dict(entry, offset=offsets[entry["offset"]]))
+                index = json.dumps({"backups": compacted}).encode("utf-8")
+                index_offset = file.tell()
+                file.write(index)
+                file.write(_FOOTER.pack(index_offset, len(index), FOOTER_MAGIC))
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
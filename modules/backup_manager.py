@@ -1,14 +1,178 @@
+import json
 import os
-from datetime import datetime
-import shutil
+import re
+from datetime import datetime, timedelta
+from modules.contact import Contact
 import utils.helper_functions as hf
 
 
+# Name of the manifest that maps backup names to timestamps and content hashes
+MANIFEST_NAME = "manifest.json"
+# Subfolder holding one file per distinct backup content, named by its SHA-256
+BLOB_FOLDER = "blobs"
+# Name of the packed archive used in archive mode
+ARCHIVE_NAME = "backups.pack"
+
+
+def _sha256(content):
+    """Returns the SHA-256 hex digest of the given bytes."""
+    import hashlib  # Loaded with the first backup instead of at startup
+
+    return hashlib.sha256(content).hexdigest()
+
+
+def _backup_sort_key(backup_filename):
+    """
+    Returns the key that sorts backup filenames chronologically.
+
+    Backups made in the same second get a counter suffix ('_1', '_2', ...),
+    which is compared as a number so '_10' follows '_9'. Names without
+    seconds sort before the names with seconds of the same minute.
+    """
+    match = re.match(
+        r"^contacts_backup_(\d{4}_\d{2}_\d{2}_\d{2}_\d{2})(?:_(\d{2}))?(?:_(\d+))?\.json$",
+        backup_filename
+    )
+    if not match:
+        return backup_filename, -1, 0
+    second = int(match.group(2)) if match.group(2) else -1
+    counter = int(match.group(3)) if match.group(3) else 0
+    return match.group(1), second, counter
+
+
+def _contact_schema():
+    """
+    Returns the accepted and the required fields of a stored contact: the
+    contact and synchronization fields of Contact, of which name and phones
+    are required.
+    """
+    accepted = set(Contact.FIELDS) | set(Contact.META_FIELDS)
+    required = {"name", "phones"}
+    return accepted, required
+
+
+def validate_contacts_data(contacts_list):
+    """
+    Checks that parsed JSON data is a list of valid contact dictionaries.
+
+    Parameters:
+    -----------
+    contacts_list : any
+        The parsed content of a contacts file.
+
+    Returns:
+    --------
+    str or None
+        A description of the first problem found, or None if the data is valid.
+    """
+    if not isinstance(contacts_list, list):
+        return "Top-level JSON value is not a list."
+
+    accepted, required = _contact_schema()
+    for index, data in enumerate(contacts_list, start=1):
+        if not isinstance(data, dict):
+            return f"Entry {index} is not an object."
+        missing = required - data.keys()
+        if missing:
+            return f"Entry {index} is missing field(s): {', '.join(sorted(missing))}."
+        unknown = data.keys() - accepted
+        if unknown:
+            return f"Entry {index} has unknown field(s): {', '.join(sorted(unknown))}."
+        if not isinstance(data["name"], str) or not data["name"].strip():
+            return f"Entry {index} has an invalid name."
+        phones = data["phones"]
+        if not isinstance(phones, list) or not all(isinstance(phone, str) for phone in phones):
+            return f"Entry {index} ('{data['name']}') has an invalid phone list."
+        for field in ("email", "address", "birthday", "notes"):
+            if not isinstance(data.get(field), (str, type(None))):
+                return f"Entry {index} ('{data['name']}') has an invalid {field}."
+        for field in ("version", "seq"):
+            if not isinstance(data.get(field, 0), int):
+                return f"Entry {index} ('{data['name']}') has an invalid {field}."
+    return None
+
+
+def verify_backup_file(backup_path, expected_sha256=None):
+    """
+    Checksums, parses and validates a single backup file.
+
+    This is a module-level function so it can run in a process pool.
+
+    Parameters:
+    -----------
+    backup_path : str
+        The path of the backup file.
+    expected_sha256 : str, optional
+        The hash recorded in the manifest, if any.
+
+    Returns:
+    --------
+    dict
+        "path", "ok" (bool), "sha256", "contacts" (number of entries) and
+        "error" (None or a description of the problem).
+    """
+    try:
+        with open(backup_path, "rb") as file:
+            content = file.read()
+    except IOError as e:
+        return {
+            "path": backup_path, "ok": False, "sha256": None, "contacts": 0,
+            "error": f"Unreadable: {str(e)}"
+        }
+    return verify_backup_content(content, expected_sha256, backup_path)
+
+
+def verify_backup_content(content, expected_sha256=None, backup_path=None):
+    """
+    Checksums, parses and validates the content of a backup.
+
+    Parameters:
+    -----------
+    content : bytes
+        The backup content.
+    expected_sha256 : str, optional
+        The hash recorded in the manifest or archive index, if any.
+    backup_path : str, optional
+        Where the content came from (reported as "path").
+
+    Returns:
+    --------
+    dict
+        See verify_backup_file.
+    """
+    result = {"path": backup_path, "ok": False, "sha256": None, "contacts": 0, "error": None}
+    result["sha256"] = _sha256(content)
+    if expected_sha256 and result["sha256"] != expected_sha256:
+        result["error"] = "Checksum mismatch with the backup manifest."
+        return result
+
+    if not content.strip():
+        result["error"] = "File is empty."
+        return result
+    try:
+        contacts_list = json.loads(content.decode("utf-8"))
+    except UnicodeDecodeError:
+        result["error"] = "File is not valid UTF-8."
+        return result
+    except json.JSONDecodeError as e:
+        if e.pos >= len(content.rstrip()):
+            result["error"] = "File is truncated."
+        else:
+            result["error"] = f"Invalid JSON: {e.msg} (line {e.lineno})."
+        return result
+
+    result["error"] = validate_contacts_data(contacts_list)
+    result["ok"] = result["error"] is None
+    if isinstance(contacts_list, list):
+        result["contacts"] = len(contacts_list)
+    return result
+
+
 class BackupManager:
     """
     A class to manage backups of a file (e.g., contacts database).
     """
-    def __init__(self, backup_folder="backup/"):
+    def __init__(self, backup_folder="backup/", archive=None):
         """
         Initialize BackupManager with a specified backup folder.
         
@@ -16,9 +180,21 @@ class BackupManager:
         -----------
         backup_folder : str, optional
             The directory where backups will be stored (default is "backup/").
+        archive : bool, optional
+            Store the backups in a single packed archive ('backups.pack', see
+            BackupArchive) instead of one file per backup. By default the
+            archive is used if the folder contains one (see migrate_to_archive).
         """
         self.backup_folder = backup_folder
         self._ensure_backup_folder_exists()
+        archive_path = os.path.join(backup_folder, ARCHIVE_NAME)
+        if archive is None:
+            archive = os.path.isfile(archive_path)
+        self.archive = None
+        if archive:
+            from modules.backup_archive import BackupArchive  # Only needed in archive mode
+
+            self.archive = BackupArchive(archive_path)
 
     def _ensure_backup_folder_exists(self):
         """
@@ -28,34 +204,269 @@ class BackupManager:
         # 'exist_ok=True' avoids an error if the folder already exists.
         os.makedirs(self.backup_folder, exist_ok=True)
 
-    def create_backup(self, db_name):
+    def create_backup(self, db_name, content=None, timestamp=None, quiet=False):
         """
-        Create a timestamped backup of the specified file.
+        Create a timestamped, content-addressed backup of the specified file.
+
+        The file content is hashed (SHA-256) and stored once as a blob in the
+        'blobs' subfolder. The timestamped backup file is a hard link to that
+        blob, and the manifest maps each backup name to its timestamp and hash.
+        If the content is identical to the most recent backup, no new backup
+        is created. Identical content seen earlier is hard-linked, not copied.
 
         Parameters:
         -----------
         db_name : str
             The file name (or path) of the contacts file to back up.
+        content : bytes, optional
+            The serialized contacts to back up instead of reading 'db_name'
+            (used for sharded storage, where there is no single file).
+        timestamp : datetime, optional
+            The time the content was saved (default is now). Point-in-time
+            restore replays the change log from this time, so it must not
+            be later than the content.
+        quiet : bool, optional
+            Only report errors, e.g. for backups made in the background
+            (default is False).
+
+        Returns:
+        --------
+        str or None
+            The backup filename (the existing one if the content was unchanged),
+            or None if the backup failed.
         """
+        try:
+            if content is None:
+                with open(db_name, "rb") as file:
+                    content = file.read()
+        except FileNotFoundError:
+            hf.show_error_message(f"Error: The contact file '{db_name}' was not found.")
+            return None
+        except Exception as e:
+            hf.show_error_message(f"Error during backup: {str(e)}")
+            return None
+
+        digest = _sha256(content)
+        now = timestamp or datetime.now()
+        if self.archive is not None:
+            return self._archive_backup(digest, content, now, quiet)
+        manifest = self._load_manifest()
 
-        # Generate a timestamp
-        current_time = datetime.now().strftime("%Y_%m_%d_%H_%M")
+        # Skip the backup entirely if nothing changed since the last one
+        if manifest and manifest[-1]["sha256"] == digest:
+            last_backup = manifest[-1]["name"]
+            if self.get_backup_file(last_backup):
+                if not quiet:
+                    hf.show_info_message(f"No changes since last backup: {last_backup}")
+                return last_backup
+
+        backup_name = self._unique_backup_name(now)
 
         # Creates the backup file path with a timestamped filename.
-        backup_db = os.path.join(
-            self.backup_folder,
-            f"contacts_backup_{current_time}.json"
-        )
+        backup_db = os.path.join(self.backup_folder, backup_name)
 
         try:
-            # Copy the file to the backup folder
-            shutil.copy(db_name, backup_db)
-            hf.show_success_message(f"Backup successfully created: {backup_db}")
-        except FileNotFoundError:
-            print(f"Error: The contact file '{db_name}' was not found.")
+            # Store the content once and hard-link the timestamped name to it
+            blob_path = self._store_blob(digest, content)
+            self._link_or_copy(blob_path, backup_db)
+
+            manifest.append({
+                "name": backup_name,
+                "timestamp": now.isoformat(),
+                "sha256": digest
+            })
+            self._save_manifest(manifest)
+            if not quiet:
+                hf.show_success_message(f"Backup successfully created: {backup_db}")
+            return backup_name
         except Exception as e:
-            print(f"Error during backup: {str(e)}")
-            
+            hf.show_error_message(f"Error during backup: {str(e)}")
+            return None
+
+    def _archive_backup(self, digest, content, now, quiet):
+        """
+        Adds a backup to the archive, unless it is identical to the last one.
+
+        Returns:
+        --------
+        str or None
+            The backup name, or None if the backup failed.
+        """
+        try:
+            entries = self.archive.entries()
+            if entries and entries[-1]["sha256"] == digest:
+                if not quiet:
+                    hf.show_info_message(f"No changes since last backup: {entries[-1]['name']}")
+                return entries[-1]["name"]
+
+            backup_name = self._unique_backup_name(now, {entry["name"] for entry in entries})
+            self.archive.append([(backup_name, now.isoformat(), digest, content)])
+            if not quiet:
+                hf.show_success_message(f"Backup successfully created: {backup_name} (in {self.archive.path})")
+            return backup_name
+        except (OSError, ValueError) as e:
+            hf.show_error_message(f"Error during backup: {str(e)}")
+            return None
+
+    def _unique_backup_name(self, now, taken=()):
+        """
+        Returns a backup filename for the given time that does not exist yet.
+        A counter suffix is appended if several backups share the same second.
+        """
+        base_name = f"contacts_backup_{now.strftime('%Y_%m_%d_%H_%M_%S')}"
+        backup_name = f"{base_name}.json"
+        counter = 1
+        while backup_name in taken or os.path.exists(os.path.join(self.backup_folder, backup_name)):
+            backup_name = f"{base_name}_{counter}.json"
+            counter += 1
+        return backup_name
+
+    def _store_blob(self, digest, content):
+        """
+        Stores content under its hash in the blob folder, unless already present.
+
+        Returns:
+        --------
+        str
+            The path of the blob file.
+        """
+        blob_folder = os.path.join(self.backup_folder, BLOB_FOLDER)
+        os.makedirs(blob_folder, exist_ok=True)
+        blob_path = os.path.join(blob_folder, f"{digest}.json")
+
+        if not os.path.exists(blob_path):
+            # Write to a temporary file first so a crash never leaves a partial blob
+            tmp_path = blob_path + ".tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(content)
+            os.replace(tmp_path, blob_path)
+        return blob_path
+
+    def _link_or_copy(self, source, target):
+        """
+        Hard-links 'target' to 'source', falling back to a copy on file systems
+        without hard link support.
+        """
+        try:
+            os.link(source, target)
+        except OSError:
+            import shutil  # Only needed on file systems without hard links
+            shutil.copyfile(source, target)
+
+    def _load_manifest(self):
+        """
+        Loads the backup manifest (a list of entries with name, timestamp and sha256).
+
+        Returns:
+        --------
+        list
+            The manifest entries in creation order, or an empty list.
+        """
+        manifest_path = os.path.join(self.backup_folder, MANIFEST_NAME)
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as file:
+                return json.load(file).get("backups", [])
+        except FileNotFoundError:
+            return []
+        except (json.JSONDecodeError, AttributeError):
+            hf.show_warning_message(f"Warning: Backup manifest '{manifest_path}' is invalid and will be rebuilt.")
+            return []
+
+    def _save_manifest(self, manifest):
+        """
+        Writes the backup manifest atomically.
+        """
+        manifest_path = os.path.join(self.backup_folder, MANIFEST_NAME)
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"backups": manifest}, file, indent=4)
+        os.replace(tmp_path, manifest_path)
+
+    def _index_entries(self):
+        """
+        Returns the recorded backups (dictionaries with "name", "timestamp"
+        and "sha256") from the archive index or the manifest.
+        """
+        if self.archive is not None:
+            try:
+                return self.archive.entries()
+            except ValueError as e:
+                hf.show_error_message(f"Error: {str(e)}")
+                return []
+        return self._load_manifest()
+
+    def deduplicate_backups(self):
+        """
+        Moves loose backups that are not yet in the manifest (e.g. backups created
+        by older versions) into content-addressed storage, so identical files
+        share a single blob on disk.
+
+        Returns:
+        --------
+        int
+            The number of backup files that were registered in the manifest.
+        """
+        if self.archive is not None:
+            return 0  # The archive stores identical content only once
+        manifest = self._load_manifest()
+        known = {entry["name"] for entry in manifest}
+        registered = 0
+
+        for backup_name in sorted(os.listdir(self.backup_folder), key=_backup_sort_key):
+            if not backup_name.startswith("contacts_backup_") or backup_name in known:
+                continue
+
+            backup_path = os.path.join(self.backup_folder, backup_name)
+            with open(backup_path, "rb") as file:
+                content = file.read()
+            digest = _sha256(content)
+
+            # Replace the loose file by a hard link to the shared blob
+            blob_path = self._store_blob(digest, content)
+            if not os.path.samefile(blob_path, backup_path):
+                tmp_path = backup_path + ".tmp"
+                self._link_or_copy(blob_path, tmp_path)
+                os.replace(tmp_path, backup_path)
+
+            # The exact creation time is unknown; only the name encodes it
+            manifest.append({
+                "name": backup_name,
+                "timestamp": None,
+                "sha256": digest
+            })
+            registered += 1
+
+        # Keep the manifest in chronological order
+        manifest.sort(key=lambda entry: _backup_sort_key(entry["name"]))
+        self._save_manifest(manifest)
+        return registered
+
+    def get_backup_timestamp(self, backup_filename):
+        """
+        Returns the creation time encoded in a backup filename.
+
+        Parameters:
+        -----------
+        backup_filename : str
+            A name like 'contacts_backup_2024_10_11_00_01.json' or
+            'contacts_backup_2024_10_11_00_01_05.json'.
+
+        Returns:
+        --------
+        datetime or None
+            The timestamp, or None if the name cannot be parsed.
+        """
+        match = re.match(
+            r"^contacts_backup_(\d{4}_\d{2}_\d{2}_\d{2}_\d{2})(?:_(\d{2}))?(?:_\d+)?\.json$",
+            backup_filename
+        )
+        if not match:
+            return None
+        timestamp = datetime.strptime(match.group(1), "%Y_%m_%d_%H_%M")
+        if match.group(2):
+            timestamp = timestamp.replace(second=int(match.group(2)))
+        return timestamp
+
     def get_backup_file(self, backup_filename):
         """
         Checks if the backup file exists and returns the full file path.
@@ -69,7 +480,12 @@ class BackupManager:
         --------
         str or None
             The full path to the backup file if it exists, otherwise None.
+            In archive mode this is the path of the archive containing it.
         """
+        if self.archive is not None:
+            names = {entry["name"] for entry in self._index_entries()}
+            return self.archive.path if backup_filename in names else None
+
         # Construct the full path to the backup file
         backup_file_path = os.path.join(self.backup_folder, backup_filename)
         
@@ -80,6 +496,22 @@ class BackupManager:
             # hf.show_error_message(f"Backup file {backup_filename} not found.")
             return None
     
+    def read_backup(self, backup_filename):
+        """
+        Returns the content of a backup, or None if it doesn't exist.
+        """
+        if self.archive is not None:
+            try:
+                return self.archive.read(backup_filename)
+            except (OSError, ValueError) as e:
+                hf.show_error_message(f"Error: {str(e)}")
+                return None
+        backup_path = self.get_backup_file(backup_filename)
+        if backup_path is None:
+            return None
+        with open(backup_path, "rb") as file:
+            return file.read()
+
     def list_recent_backups(self, n=3):
         """
         Lists the most recent backup files in the backup folder.
@@ -99,14 +531,221 @@ class BackupManager:
             hf.show_error_message(f"Backup folder '{self.backup_folder}' not found.")
             return []
     
-        # List all files that start with "contacts_backup_" in the backup folder
-        backup_files = [file for file in os.listdir(self.backup_folder) if file.startswith("contacts_backup_")]
-        
-        # # Sort the files by their modification time in descending order
-        backup_files.sort(key=lambda x: os.path.getmtime(os.path.join(self.backup_folder, x)), reverse=True)
+        # Return the most recent 'n' backup files, newest first
+        return self.list_backups()[::-1][:n]
+
+    def list_backups(self):
+        """
+        Lists all backup files in chronological order.
+
+        The order follows the timestamp encoded in the name. The modification
+        time can't be used, because hard-linked backups share it with their blob.
+
+        Returns:
+        --------
+        list
+            The backup filenames, oldest first.
+        """
+        if self.archive is not None:
+            return sorted((entry["name"] for entry in self._index_entries()), key=_backup_sort_key)
+        if not os.path.exists(self.backup_folder):
+            return []
+        return self._loose_backups()
+
+    def find_backup_before(self, timestamp):
+        """
+        Finds the newest backup created at or before the given time.
+
+        Parameters:
+        -----------
+        timestamp : datetime
+            The point in time.
+
+        Returns:
+        --------
+        tuple or None
+            (backup_filename, backup_timestamp), or None if there is no such backup.
+        """
+        # Exact creation times recorded in the manifest (or archive index)
+        exact_times = {
+            entry["name"]: datetime.fromisoformat(entry["timestamp"])
+            for entry in self._index_entries() if entry.get("timestamp")
+        }
+
+        for backup_name in reversed(self.list_backups()):
+            backup_time = exact_times.get(backup_name)
+            if backup_time is not None:
+                if backup_time <= timestamp:
+                    return backup_name, backup_time
+                continue
+
+            # Names are truncated to the minute (or second), so the backup may
+            # have been created up to that resolution later than its name says
+            backup_time = self.get_backup_timestamp(backup_name)
+            if backup_time is None:
+                continue
+            has_seconds = re.match(r"^contacts_backup_(\d+_){5}\d{2}", backup_name)
+            resolution = timedelta(seconds=1) if has_seconds else timedelta(minutes=1)
+            if backup_time + resolution <= timestamp:
+                return backup_name, backup_time
+        return None
+
+    def verify_backup(self, backup_filename):
+        """
+        Verifies a single backup (checksum, JSON and contact schema).
+
+        Parameters:
+        -----------
+        backup_filename : str
+            The name of the backup file.
+
+        Returns:
+        --------
+        dict
+            The verification result (see verify_backup_file) plus "name".
+        """
+        expected = {entry["name"]: entry["sha256"] for entry in self._index_entries()}
+        if self.archive is not None:
+            content = self.read_backup(backup_filename)
+            if content is None:
+                result = {
+                    "path": self.archive.path, "ok": False, "sha256": None, "contacts": 0,
+                    "error": "Not found in the backup archive."
+                }
+            else:
+                result = verify_backup_content(
+                    content, expected.get(backup_filename), self.archive.path
+                )
+        else:
+            backup_path = os.path.join(self.backup_folder, backup_filename)
+            result = verify_backup_file(backup_path, expected.get(backup_filename))
+        result["name"] = backup_filename
+        return result
+
+    def verify_backups(self, max_workers=None, use_processes=False):
+        """
+        Verifies all backups concurrently.
+
+        Parameters:
+        -----------
+        max_workers : int, optional
+            The size of the worker pool (default chosen by the executor).
+        use_processes : bool, optional
+            Use a process pool instead of a thread pool (default is False).
+            Worth it only for very large backups, where JSON parsing dominates.
+
+        Returns:
+        --------
+        list
+            One verification result per backup, oldest first.
+        """
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor  # Only needed here
+
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+
+        if self.archive is not None:
+            # Read all members with a single open, then verify them in parallel
+            try:
+                members = sorted(
+                    self.archive.read_all(), key=lambda member: _backup_sort_key(member[0]["name"])
+                )
+            except (OSError, ValueError) as e:
+                hf.show_error_message(f"Error: {str(e)}")
+                return []
+            backup_names = [entry["name"] for entry, _ in members]
+            with executor_class(max_workers=max_workers) as executor:
+                results = list(executor.map(
+                    verify_backup_content,
+                    [content for _, content in members],
+                    [entry["sha256"] for entry, _ in members],
+                    [self.archive.path] * len(members)
+                ))
+        else:
+            backup_names = self.list_backups()
+            expected = {entry["name"]: entry["sha256"] for entry in self._load_manifest()}
+            paths = [os.path.join(self.backup_folder, name) for name in backup_names]
+            hashes = [expected.get(name) for name in backup_names]
+            with executor_class(max_workers=max_workers) as executor:
+                results = list(executor.map(verify_backup_file, paths, hashes))
+
+        for name, result in zip(backup_names, results):
+            result["name"] = name
+        return results
+
+    def migrate_to_archive(self):
+        """
+        Moves all loose backup files (and the blobs and manifest) into the
+        packed archive, and switches this BackupManager to archive mode.
 
-        # # Return the most recent 'n' backup files
-        return backup_files[:n]
-        # backups = sorted(os.listdir(self.backup_folder), reverse=True)
-        # return backups[:n]
+        The archive is written completely before any loose file is deleted. A
+        loose file whose name is already in the archive is only deleted if its
+        content matches the archived backup; otherwise it is kept and reported.
 
+        Returns:
+        --------
+        int
+            The number of migrated backups.
+        """
+        if self.archive is not None and not self._loose_backups():
+            return 0
+
+        from modules.backup_archive import BackupArchive  # Only needed in archive mode
+
+        archive = self.archive or BackupArchive(os.path.join(self.backup_folder, ARCHIVE_NAME))
+        taken = {entry["name"]: entry["sha256"] for entry in archive.entries()}
+        times = {entry["name"]: entry.get("timestamp") for entry in self._load_manifest()}
+
+        snapshots = []
+        migrated = []  # Loose files whose content is in the archive afterwards
+        mismatched = []  # Loose files that differ from the archived backup of the same name
+        for backup_name in self._loose_backups():
+            with open(os.path.join(self.backup_folder, backup_name), "rb") as file:
+                content = file.read()
+            digest = _sha256(content)
+            if backup_name in taken:
+                if taken[backup_name] == digest:
+                    migrated.append(backup_name)
+                else:
+                    mismatched.append(backup_name)
+                continue
+            snapshots.append((backup_name, times.get(backup_name), digest, content))
+            migrated.append(backup_name)
+
+        archive.append(snapshots)
+
+        # Check that every backup reads back intact before deleting anything
+        for backup_name, _, digest, _ in snapshots:
+            content = archive.read(backup_name)
+            if content is None or _sha256(content) != digest:
+                raise ValueError(
+                    f"Backup '{backup_name}' could not be read back from the archive. "
+                    "The loose backup files were kept."
+                )
+        self.archive = archive
+
+        # Remove the migrated files
+        for backup_name in migrated:
+            os.remove(os.path.join(self.backup_folder, backup_name))
+        if mismatched:
+            # Keep the manifest and blobs with the files that were not migrated
+            hf.show_warning_message(
+                "These backup files differ from the archived backups of the same name "
+                f"and were kept: {', '.join(mismatched)}"
+            )
+            return len(snapshots)
+        blob_folder = os.path.join(self.backup_folder, BLOB_FOLDER)
+        if os.path.isdir(blob_folder):
+            import shutil  # Only needed for the migration
+            shutil.rmtree(blob_folder)
+        manifest_path = os.path.join(self.backup_folder, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        return len(snapshots)
+
+    def _loose_backups(self):
+        """Returns the names of the backup files in the folder, oldest first."""
+        return sorted(
+            (file for file in os.listdir(self.backup_folder)
+             if file.startswith("contacts_backup_") and file.endswith(".json")),
+            key=_backup_sort_key
+        )
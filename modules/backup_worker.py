@@ -0,0 +1,140 @@
+"""
+This module defines the BackupWorker class, which creates backups on a
+background thread, so saving contacts doesn't wait for the backup I/O.
+Requests that pile up while a backup is running are coalesced into a single
+backup of the latest state.
+
+A backup is stamped with the time its content was saved, not the time the
+worker got to it, so point-in-time restore replays every later change.
+"""
+
+import os
+import queue
+import threading
+from datetime import datetime
+import utils.helper_functions as hf
+
+
+# Marks the end of the request queue
+_STOP = object()
+
+
+class BackupWorker:
+    """
+    A background thread that runs BackupManager.create_backup.
+
+    Attributes:
+    -----------
+    backup_manager : BackupManager  | Creates the backups.
+    io_lock : threading.Lock        | Held while reading the database file, so
+                                    | a backup never sees a half-written file.
+    saved_at : datetime or None     | The time the database file was last written,
+                                    | set by the writer while holding io_lock
+                                    | (None: use the modification time).
+    completed : int                 | Number of backups run (coalesced requests count once).
+    failed : int                    | Number of backups that failed.
+    """
+    def __init__(self, backup_manager, io_lock, max_pending=8):
+        """
+        Initialize the worker and start its thread.
+
+        Parameters:
+        -----------
+        backup_manager : BackupManager
+            The BackupManager creating the backups.
+        io_lock : threading.Lock
+            The lock the ContactManager holds while writing the database.
+        max_pending : int, optional
+            The capacity of the request queue (default is 8). When it is full,
+            submit() waits until the worker has caught up.
+        """
+        self.backup_manager = backup_manager
+        self.io_lock = io_lock
+        self.saved_at = None
+        self.completed = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, db_name, content=None, timestamp=None):
+        """
+        Schedules a backup of 'db_name' (or of 'content' saved at 'timestamp',
+        see BackupManager.create_backup) and returns immediately.
+        """
+        if not self._thread.is_alive():
+            hf.show_error_message("Error: The backup worker is not running, backing up now.")
+            self._backup(db_name, content, timestamp)
+            return
+        self._queue.put((db_name, content, timestamp))
+
+    def _run(self):
+        """Processes requests until stop() is called."""
+        while True:
+            request = self._queue.get()
+            requests = [request]
+
+            # Coalesce everything that is already waiting
+            while True:
+                try:
+                    requests.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(item is _STOP for item in requests)
+            latest = {}
+            for item in requests:
+                if item is not _STOP:
+                    latest[item[0]] = item[1:]  # The last request per database wins
+            for db_name, (content, timestamp) in latest.items():
+                self._backup(db_name, content, timestamp)
+
+            for _ in requests:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _backup(self, db_name, content, timestamp):
+        """Creates one backup and reports failures."""
+        try:
+            if content is None:
+                # Read the file here, so a half-written database is never backed up
+                with self.io_lock:
+                    content, timestamp = self._read(db_name)
+                if content is None:
+                    self.failed += 1
+                    return
+            if self.backup_manager.create_backup(db_name, content, timestamp, quiet=True) is None:
+                self.failed += 1
+            else:
+                self.completed += 1
+        except Exception as e:
+            self.failed += 1
+            hf.show_error_message(f"Error: Background backup failed: {str(e)}")
+
+    def _read(self, db_name):
+        """
+        Reads the database file and the time it was saved, or reports the
+        error and returns (None, None).
+        """
+        try:
+            with open(db_name, "rb") as file:
+                content = file.read()
+                timestamp = self.saved_at
+                if timestamp is None:
+                    timestamp = datetime.fromtimestamp(os.fstat(file.fileno()).st_mtime)
+                return content, timestamp
+        except OSError as e:
+            hf.show_error_message(f"Error: Background backup could not read '{db_name}': {str(e)}")
+            return None, None
+
+    def flush(self):
+        """Blocks until every scheduled backup has been created."""
+        if self._thread.is_alive():
+            self._queue.join()
+
+    def stop(self):
+        """Creates the scheduled backups and ends the thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
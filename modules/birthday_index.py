@@ -0,0 +1,181 @@
+"""
+This module defines the BirthdayIndex class, which keeps contacts sorted by the
+(month, day) of their birthday. Birthdays are parsed once when a contact is
+indexed, and upcoming birthdays are found with binary search in O(log n + k).
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+
+
+# Supported birthday formats: "12.01.1990", "12.01.", "12/01/1990", "1990-01-12"
+_DAY_FIRST = re.compile(r"^\s*(\d{1,2})[./](\d{1,2})(?:[./](\d{2,4})?)?\s*$")
+_ISO = re.compile(r"^\s*(\d{4})-(\d{1,2})-(\d{1,2})\s*$")
+
+
+def parse_birthday(birthday):
+    """
+    Parses a birthday string into a (month, day) key.
+
+    Parameters:
+    -----------
+    birthday : str
+        A birthday like "12.01.1990", "12.01.", "12/01/1990" or "1990-01-12".
+
+    Returns:
+    --------
+    tuple or None
+        (month, day), or None if the value is empty or can't be parsed.
+    """
+    if not birthday:
+        return None
+
+    match = _DAY_FIRST.match(birthday)
+    if match:
+        day, month = int(match.group(1)), int(match.group(2))
+    else:
+        match = _ISO.match(birthday)
+        if not match:
+            return None
+        month, day = int(match.group(2)), int(match.group(3))
+
+    # Validate against a leap year so 29.02. is accepted
+    try:
+        date(2000, month, day)
+    except ValueError:
+        return None
+    return month, day
+
+
+def next_occurrence(key, today):
+    """
+    Returns the date of the next birthday with the given (month, day) key,
+    today included. 29.02. falls on 28.02. in non-leap years.
+    """
+    month, day = key
+    for year in (today.year, today.year + 1):
+        try:
+            occurrence = date(year, month, day)
+        except ValueError:
+            occurrence = date(year, 2, 28)
+        if occurrence >= today:
+            return occurrence
+    return occurrence
+
+
+def _is_leap_year(year):
+    """True if the year has a 29.02."""
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+class BirthdayIndex:
+    """
+    A sorted index of contacts by birthday (month, day).
+
+    Attributes:
+    -----------
+    _keys : list        | Sorted (month, day) keys.
+    _contacts : list    | Contacts, parallel to _keys.
+    _key_by_id : dict   | The indexed key of each contact, by id(contact).
+    """
+    def __init__(self, contacts=()):
+        """Initialize the index with the given contacts."""
+        self.rebuild(contacts)
+
+    def rebuild(self, contacts):
+        """Rebuilds the index from scratch with a single sort."""
+        entries = []
+        self._key_by_id = {}
+        for contact in contacts:
+            key = parse_birthday(contact.birthday)
+            if key is not None:
+                self._key_by_id[id(contact)] = key
+                entries.append((key, contact))
+
+        entries.sort(key=lambda entry: entry[0])
+        self._keys = [key for key, _ in entries]
+        self._contacts = [contact for _, contact in entries]
+
+    def add(self, contact):
+        """Adds a contact, if it has a valid birthday."""
+        key = parse_birthday(contact.birthday)
+        if key is None:
+            return
+        position = bisect_right(self._keys, key)
+        self._keys.insert(position, key)
+        self._contacts.insert(position, contact)
+        self._key_by_id[id(contact)] = key
+
+    def remove(self, contact):
+        """Removes a contact, using the key it was indexed with."""
+        key = self._key_by_id.pop(id(contact), None)
+        if key is None:
+            return
+        position = bisect_left(self._keys, key)
+        while position < len(self._keys) and self._keys[position] == key:
+            if self._contacts[position] is contact:
+                del self._keys[position]
+                del self._contacts[position]
+                return
+            position += 1
+
+    def __len__(self):
+        """Returns the number of indexed contacts."""
+        return len(self._keys)
+
+    def _range(self, start_key, end_key):
+        """Returns (key, contact) tuples with start_key <= key <= end_key."""
+        low = bisect_left(self._keys, start_key)
+        high = bisect_right(self._keys, end_key)
+        return list(zip(self._keys[low:high], self._contacts[low:high]))
+
+    def between(self, start_key, end_key):
+        """
+        Returns the contacts whose (month, day) key is between start_key and
+        end_key (both included), e.g. all birthdays in a month.
+        """
+        low = bisect_left(self._keys, start_key)
+        high = bisect_right(self._keys, end_key)
+        return self._contacts[low:high]
+
+    def count_between(self, start_key, end_key):
+        """Returns the number of contacts between start_key and end_key, in O(log n)."""
+        return bisect_right(self._keys, end_key) - bisect_left(self._keys, start_key)
+
+    def upcoming(self, days=14, today=None):
+        """
+        Finds contacts whose birthday is within the next 'days' days.
+
+        Parameters:
+        -----------
+        days : int, optional
+            The size of the window, today included (default is 14).
+        today : date, optional
+            The first day of the window (default is the current date).
+
+        Returns:
+        --------
+        list
+            (date, contact) tuples ordered by the date of the next birthday.
+        """
+        today = today or date.today()
+        if days <= 0:
+            return []
+        if days > 365:
+            entries = list(zip(self._keys, self._contacts))
+        else:
+            end = today + timedelta(days=days - 1)  # The last day of the window
+            start_key = (today.month, today.day)
+            end_key = (end.month, end.day)
+            if end_key == (2, 28) and not _is_leap_year(end.year):
+                end_key = (2, 29)  # 29.02. falls on 28.02. (see next_occurrence)
+            if start_key <= end_key and end.year == today.year:
+                entries = self._range(start_key, end_key)
+            else:
+                # The window wraps around the end of the year
+                entries = self._range(start_key, (12, 31)) + self._range((1, 1), end_key)
+
+        results = [(next_occurrence(key, today), contact) for key, contact in entries]
+        results.sort(key=lambda result: result[0])
+        return results
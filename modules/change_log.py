@@ -0,0 +1,182 @@
+"""
+This module defines the ChangeLog class, an append-only log of contact changes
+(add, update, delete, restore) stored as one compact JSON object per line.
+Together with the backup snapshots it allows reconstructing the contact list
+as of any point in time by replaying the changes made after a snapshot.
+"""
+
+import json
+from datetime import datetime
+from modules.contact import Contact
+import utils.helper_functions as hf
+
+
+class ChangeLog:
+    """
+    A class to record and replay contact changes.
+
+    Each line of the log file is a JSON object with the keys:
+    ts   : str  | ISO timestamp of the change.
+    op   : str  | "add", "update", "delete" or "restore".
+    name : str  | Name of the affected contact (the name before an update).
+    data : dict | All fields for "add", only the changed fields for "update".
+    For "restore" entries, "backup" names the restored backup file or
+    "until" holds the timestamp a point-in-time restore went back to.
+    """
+    def __init__(self, log_file):
+        """
+        Initialize the ChangeLog.
+
+        Parameters:
+        -----------
+        log_file : str
+            The path of the log file. It is created on the first change.
+        """
+        self.log_file = log_file
+
+    def record(self, op, name=None, data=None, **extra):
+        """
+        Appends a change to the log.
+
+        Parameters:
+        -----------
+        op : str
+            The kind of change ("add", "update", "delete", "restore").
+        name : str, optional
+            The name of the affected contact.
+        data : dict, optional
+            The new field values.
+        **extra : dict
+            Additional keys stored with the entry (e.g. backup="...").
+        """
+        self.record_many([(op, name, data, extra)])
+
+    def record_many(self, changes):
+        """
+        Appends several changes to the log with a single file open.
+
+        Parameters:
+        -----------
+        changes : iterable
+            (op, name, data, extra) tuples, as described in record().
+        """
+        lines = []
+        for op, name, data, extra in changes:
+            entry = {"ts": datetime.now().isoformat(), "op": op}
+            if name is not None:
+                entry["name"] = name
+            if data is not None:
+                entry["data"] = data
+            entry.update(extra or {})
+            lines.append(json.dumps(entry, separators=(",", ":")) + "\n")
+
+        if not lines:
+            return
+        try:
+            with open(self.log_file, "a", encoding="utf-8") as file:
+                file.writelines(lines)
+        except IOError:
+            hf.show_warning_message(
+                f"Warning: Could not write to change log '{self.log_file}'."
+            )
+
+    def iter_entries(self, after=None, until=None):
+        """
+        Yields log entries in order, optionally limited to a time range.
+
+        Parameters:
+        -----------
+        after : datetime, optional
+            Only entries strictly later than this time are returned.
+        until : datetime, optional
+            Reading stops at the first entry later than this time.
+
+        Yields:
+        -------
+        dict
+        """
+        try:
+            file = open(self.log_file, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+
+        with file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                    timestamp = datetime.fromisoformat(entry["ts"])
+                except (json.JSONDecodeError, KeyError, ValueError):
+                    # Skip a partially written last line
+                    continue
+
+                if until is not None and timestamp > until:
+                    break  # The log is in chronological order
+                if after is not None and timestamp <= after:
+                    continue
+                yield entry
+
+
+def replay(contacts, entries, resolve_restore):
+    """
+    Applies log entries to a list of contacts.
+
+    Replaying is idempotent for entries that are already part of the starting
+    list (an "add" of an existing name overwrites it, an "update" or "delete"
+    of a missing contact is ignored), so starting from a snapshot whose
+    timestamp is slightly earlier than its real creation time is safe.
+
+    Parameters:
+    -----------
+    contacts : list
+        The Contact objects to start from (e.g. loaded from a snapshot).
+    entries : iterable
+        Log entries as yielded by ChangeLog.iter_entries().
+    resolve_restore : callable
+        Called with a "restore" entry; must return the list of Contact objects
+        the restore switched to.
+
+    Returns:
+    --------
+    list
+        The resulting Contact objects, in list order.
+    """
+    ordered = list(contacts)
+    by_name = {contact.name: contact for contact in ordered}
+    deleted = set()
+
+    for entry in entries:
+        op = entry.get("op")
+        name = entry.get("name")
+
+        if op == "add":
+            existing = by_name.get(name)
+            if existing is not None and id(existing) not in deleted:
+                for field, value in entry["data"].items():
+                    setattr(existing, field, value)
+            else:
+                contact = Contact.from_dict(entry["data"])
+                ordered.append(contact)
+                by_name[contact.name] = contact
+
+        elif op == "update":
+            contact = by_name.get(name)
+            if contact is None or id(contact) in deleted:
+                continue
+            for field, value in entry["data"].items():
+                setattr(contact, field, value)
+            if contact.name != name:
+                del by_name[name]
+                by_name[contact.name] = contact
+
+        elif op == "delete":
+            contact = by_name.pop(name, None)
+            if contact is not None:
+                deleted.add(id(contact))
+
+        elif op == "restore":
+            # A restore replaces the whole list
+            ordered = list(resolve_restore(entry))
+            by_name = {contact.name: contact for contact in ordered}
+            deleted = set()
+
+    return [contact for contact in ordered if id(contact) not in deleted]
@@ -3,8 +3,23 @@ This module defines the Contact class, which represents a contact with details
 such as name, phone numbers, email, address, birthday.
 It provides methods to convert the contact details to a dictionary
 and format them as a string for display.
+
+Contacts track modifications of their fields and cache their encoded JSON,
+so saving a large list only has to encode the contacts that changed.
+
+For synchronization every contact has a stable id, a version (a logical
+clock value of its last change) and the sequence number of its last change
+in the local database.
+
+Phone numbers are kept in a PhoneStore (see modules/phone_store.py), usually
+the one of the ContactManager holding the contact; a contact only holds
+them packed.
 """
 
+import json
+from modules.address_parser import parse_address
+from modules.phone_store import PhoneList, default_phone_store, pack_refs
+
 
 class Contact:
     """
@@ -13,36 +28,138 @@ class Contact:
     Attributes:
     -----------
     name : str              | The contact's name.
-    phones : list           | List of phone numbers.
+    phones : PhoneList      | List of phone numbers (behaves like a list of strings).
     email : str, optional   | Email address (default is None).
     address : str, optional | Physical address (default is None).
     birthday : str, optional| Birthday (default is None).
+    notes : str, optional   | Additional notes (default is None).
+    id : str                | Stable unique id (generated if not given).
+    version : int           | Logical clock value of the last change (default is 0).
+    seq : int               | Local sequence number of the last change (default is 0).
+    address_parts : dict    | Street, postal code and city parsed from the address.
+    phone_store : PhoneStore| The store holding the phone numbers.
+
+    Assigning any field invalidates the cached JSON fragment, and so does
+    changing 'phones' in place.
     """
+
+    # Names of the stored contact fields, in serialization order
+    FIELDS = ("name", "phones", "email", "address", "birthday", "notes")
+
+    # Names of the stored synchronization fields
+    META_FIELDS = ("id", "version", "seq")
+
     def __init__(
         self,
         name,
         phones,
         email=None,
         address=None,
-        birthday=None
+        birthday=None,
+        notes=None,
+        id=None,
+        version=0,
+        seq=0,
+        phone_store=None
     ):
-        """Initialize a Contact with the provided details."""
+        """
+        Initialize a Contact with the provided details. The phone numbers go
+        into 'phone_store', or into the store shared by contacts outside a
+        ContactManager if it is None.
+        """
+        self.phone_store = phone_store if phone_store is not None else default_phone_store()
         self.name = name
         self.phones = phones
         self.email = email
         self.address = address
         self.birthday = birthday
+        self.notes = notes
+        self.id = id or new_contact_id()
+        self.version = version
+        self.seq = seq
+
+    @classmethod
+    def from_dict(cls, data, phone_store=None):
+        """
+        Creates a contact from a stored dictionary. Contacts stored before ids
+        were introduced get an id derived from their name, so copies of the
+        same old database agree on the ids.
+        """
+        if data.get("id") is None:
+            data = dict(data, id=legacy_contact_id(data["name"]))
+        return cls(**data, phone_store=phone_store)
+
+    def __setattr__(self, attribute, value):
+        """Sets an attribute and marks the contact as modified if it is a field."""
+        object.__setattr__(self, attribute, value)
+        if attribute in Contact.FIELDS or attribute in Contact.META_FIELDS:
+            object.__setattr__(self, "_json_cache", None)
+
+    @property
+    def dirty(self):
+        """True if a field changed since the JSON fragment was last encoded."""
+        return self._json_cache is None
+
+    @property
+    def phones(self):
+        """The phone numbers, a live list view of the packed phones in the phone store."""
+        return PhoneList(self)
+
+    @phones.setter
+    def phones(self, phones):
+        """Sets the phone numbers, interning new numbers in the phone store."""
+        if isinstance(phones, PhoneList) and phones._store is self.phone_store:
+            self._phone_refs = phones._refs  # Immutable bytes, so they can be shared
+        else:
+            self._phone_refs = pack_refs(self.phone_store, phones)
+
+    def use_phone_store(self, phone_store):
+        """Moves the phone numbers into another store, e.g. the one of a ContactManager."""
+        if phone_store is not self.phone_store:
+            phones = list(self.phones)
+            self.phone_store = phone_store
+            self._phone_refs = pack_refs(phone_store, phones)
+
+    @property
+    def address(self):
+        """The physical address as entered."""
+        return self._address
+
+    @address.setter
+    def address(self, value):
+        """Sets the address and tokenizes it into address_parts."""
+        self._address = value
+        self.address_parts = parse_address(value)
 
     def to_dict(self):
         """Return contact details as a dictionary."""
         return {
             "name": self.name,
-            "phones": self.phones,
+            "phones": list(self.phones),
             "email": self.email,
             "address": self.address,
-            "birthday": self.birthday
+            "birthday": self.birthday,
+            "notes": self.notes,
+            "id": self.id,
+            "version": self.version,
+            "seq": self.seq
         }
 
+    def __reduce__(self):
+        """Pickles the contact by value, since packed phones are only valid in their store."""
+        return (Contact.from_dict, (self.to_dict(),))
+
+    def to_json(self):
+        """
+        Returns the contact as a JSON object, formatted as an element of a list
+        written by json.dump(..., indent=4). The result is cached until a
+        field changes.
+        """
+        if self._json_cache is None:
+            encoded = json.dumps(self.to_dict(), indent=4)
+            self._json_cache = "    " + encoded.replace("\n", "\n    ")
+        return self._json_cache
+
     def __str__(self):
         """Formats the contact information as a string."""
 
@@ -57,3 +174,38 @@ class Contact:
                 f"Birthday:  {self.birthday if self.birthday else '-'}\n"
                 f"{'-'*40}\n"
                 )
+
+
+def new_contact_id():
+    """Returns a new random contact id."""
+    import uuid  # Loads the platform module, so only when ids are created
+
+    return uuid.uuid4().hex
+
+
+def legacy_contact_id(name):
+    """Returns the id of a contact stored without an id (derived from its name)."""
+    import uuid  # Loads the platform module, so only when ids are created
+
+    return uuid.uuid5(uuid.NAMESPACE_URL, "contact:" + name).hex
+
+
+def contacts_to_json(contacts):
+    """
+    Encodes a list of contacts exactly like json.dump(..., indent=4) would,
+    but splices the cached fragments of unchanged contacts instead of
+    encoding every contact again.
+
+    Parameters:
+    -----------
+    contacts : list
+        The Contact objects.
+
+    Returns:
+    --------
+    str
+        The JSON document.
+    """
+    if not contacts:
+        return "[]"
+    return "[\n" + ",\n".join(contact.to_json() for contact in contacts) + "\n]"
@@ -0,0 +1,126 @@
+"""
+This module compares two lists of contacts (e.g. the current contacts and a
+backup) and reports added, removed and modified contacts with per-field changes.
+Contacts are matched by name, or by email for renamed contacts, using
+dictionaries so a comparison runs in O(n).
+"""
+
+from modules.contact import Contact
+from modules.phone_store import PhoneList
+
+
+def _contact_key(contact):
+    """Returns the normalized name used to match contacts."""
+    return contact.name.strip().lower()
+
+
+def _email_key(contact):
+    """Returns the normalized email, or None if the contact has no email."""
+    return contact.email.strip().lower() if contact.email else None
+
+
+def _field_value(contact, field):
+    """Returns a field value, with the phones as a plain list (not a view of the contact)."""
+    value = getattr(contact, field, None)
+    return list(value) if isinstance(value, PhoneList) else value
+
+
+def field_changes(current, other):
+    """
+    Compares the stored fields of two contacts.
+
+    Returns:
+    --------
+    dict
+        {field: (current_value, other_value)} for every field that differs.
+    """
+    changes = {}
+    for field in Contact.FIELDS:
+        current_value = _field_value(current, field)
+        other_value = _field_value(other, field)
+        # Treat None and "" as equal, as both are used for empty fields
+        if (current_value or None) != (other_value or None):
+            changes[field] = (current_value, other_value)
+    return changes
+
+
+def diff_contacts(current_contacts, other_contacts):
+    """
+    Computes what would change if 'current_contacts' were replaced by 'other_contacts'.
+
+    Parameters:
+    -----------
+    current_contacts : list
+        The current Contact objects.
+    other_contacts : list
+        The Contact objects to compare against (e.g. loaded from a backup).
+
+    Returns:
+    --------
+    dict
+        "added":    contacts only in 'other_contacts',
+        "removed":  contacts only in 'current_contacts',
+        "modified": list of (current, other, changes) tuples, where 'changes'
+                    is the result of field_changes().
+    """
+    current_by_name = {}
+    current_by_email = {}
+    for contact in current_contacts:
+        current_by_name.setdefault(_contact_key(contact), contact)
+        email = _email_key(contact)
+        if email:
+            current_by_email.setdefault(email, contact)
+
+    matched = set()
+    added = []
+    modified = []
+
+    for other in other_contacts:
+        # Match by name first, then by email to detect renamed contacts
+        current = current_by_name.get(_contact_key(other))
+        if current is None or id(current) in matched:
+            email = _email_key(other)
+            current = current_by_email.get(email) if email else None
+            if current is not None and id(current) in matched:
+                current = None
+
+        if current is None:
+            added.append(other)
+            continue
+
+        matched.add(id(current))
+        changes = field_changes(current, other)
+        if changes:
+            modified.append((current, other, changes))
+
+    removed = [contact for contact in current_contacts if id(contact) not in matched]
+
+    return {"added": added, "removed": removed, "modified": modified}
+
+
+def _format_value(value):
+    """Formats a field value for display (lists are joined with commas)."""
+    if isinstance(value, (list, PhoneList)):
+        value = ", ".join(value)
+    return value or "-"
+
+
+def format_diff(diff):
+    """
+    Formats a diff as human-readable lines.
+
+    Returns:
+    --------
+    list
+        One string per line.
+    """
+    lines = []
+    for contact in diff["added"]:
+        lines.append(f"+ {contact.name}")
+    for contact in diff["removed"]:
+        lines.append(f"- {contact.name}")
+    for current, other, changes in diff["modified"]:
+        lines.append(f"~ {current.name}")
+        for field, (old_value, new_value) in changes.items():
+            lines.append(f"      {field}: {_format_value(old_value)} -> {_format_value(new_value)}")
+    return lines
@@ -0,0 +1,275 @@
+"""
+This module provides streaming importers for vCard (.vcf) and CSV files.
+Both parsers read their input line by line and yield Contact objects one
+at a time, so arbitrarily large files can be imported with bounded memory.
+"""
+
+import csv
+import quopri
+import re
+from modules.contact import Contact
+
+
+# Header names (lowercase) recognised by the CSV importer
+CSV_NAME_COLUMNS = ["name", "full name", "display name", "fn"]
+CSV_FIRST_NAME_COLUMNS = ["first name", "given name", "vorname"]
+CSV_LAST_NAME_COLUMNS = ["last name", "family name", "surname", "nachname"]
+CSV_EMAIL_COLUMNS = ["email", "e-mail", "e-mail address", "email address", "e-mail 1 - value"]
+CSV_ADDRESS_COLUMNS = ["address", "adresse", "home address", "address 1 - formatted"]
+CSV_BIRTHDAY_COLUMNS = ["birthday", "geburtstag", "bday", "date of birth"]
+
+# Separators used inside a single CSV cell holding several phone numbers
+CSV_PHONE_SEPARATORS = r"\s*(?:;|:::|\|)\s*"
+
+
+def detect_format(file_name):
+    """
+    Detects the import format from the file extension.
+
+    Parameters:
+    -----------
+    file_name : str
+        The path of the file to import.
+
+    Returns:
+    --------
+    str or None
+        "vcard", "csv" or None if the extension is not supported.
+    """
+    lower_name = file_name.lower()
+    if lower_name.endswith((".vcf", ".vcard")):
+        return "vcard"
+    if lower_name.endswith(".csv"):
+        return "csv"
+    return None
+
+
+def iter_contacts_from_file(file_name):
+    """
+    Yields Contact objects from a vCard or CSV file, chosen by extension.
+
+    Raises:
+    -------
+    ValueError
+        If the file format is not supported.
+    """
+    file_format = detect_format(file_name)
+    if file_format == "vcard":
+        return iter_vcard_contacts(file_name)
+    if file_format == "csv":
+        return iter_csv_contacts(file_name)
+    raise ValueError(f"Unsupported import format: '{file_name}'.")
+
+
+def _normalize_birthday(value):
+    """
+    Converts vCard/ISO birthdays (1990-01-12, 19900112, --0112) into the
+    "DD.MM.YYYY" format used by the rest of the application.
+    Unknown formats are returned unchanged.
+    """
+    value = value.strip()
+    match = re.match(r"^(\d{4})-?(\d{2})-?(\d{2})", value)
+    if match:
+        year, month, day = match.groups()
+        return f"{day}.{month}.{year}"
+    match = re.match(r"^--(\d{2})-?(\d{2})$", value)
+    if match:
+        month, day = match.groups()
+        return f"{day}.{month}."
+    return value
+
+
+def _unescape_vcard_value(value):
+    """Resolves vCard escape sequences (\\, \\; \\n \\\\)."""
+    return re.sub(
+        r"\\([\\,;nN])",
+        lambda m: "\n" if m.group(1) in "nN" else m.group(1),
+        value
+    )
+
+
+def _split_vcard_components(value):
+    """Splits a structured vCard value on unescaped semicolons."""
+    return [_unescape_vcard_value(part).strip() for part in re.split(r"(?<!\\);", value)]
+
+
+def _format_vcard_address(value):
+    """
+    Formats an ADR value (PO box; extended; street; city; region; postal code;
+    country) as "street, postal code city", e.g. "Kirchstr.9, 41450 Neuss".
+    """
+    parts = _split_vcard_components(value) + [""] * 7
+    street = " ".join(p for p in parts[:3] if p)
+    city_line = " ".join(p for p in (parts[5], parts[3]) if p)
+    tail = ", ".join(p for p in (parts[4], parts[6]) if p)
+    return ", ".join(p for p in (street, city_line, tail) if p)
+
+
+def _iter_unfolded_lines(file):
+    """
+    Yields logical vCard lines, joining folded continuation lines
+    (lines starting with a space or tab) and quoted-printable soft breaks.
+    """
+    current = None
+    for raw_line in file:
+        line = raw_line.rstrip("\r\n")
+        if current is not None and line[:1] in (" ", "\t"):
+            current += line[1:]
+            continue
+        if current is not None and current.endswith("=") and "QUOTED-PRINTABLE" in current.upper():
+            current = current[:-1] + line
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def _contact_from_vcard(card):
+    """
+    Builds a Contact from the collected vCard properties.
+    Returns None if the card has no name or no phone number.
+    """
+    name = card.get("FN") or card.get("N")
+    if not name or not card["TEL"]:
+        return None
+    return Contact(
+        name=" ".join(name.split()).lower(),
+        phones=card["TEL"],
+        email=(card.get("EMAIL") or "").lower(),
+        address=card.get("ADR") or "",
+        birthday=card.get("BDAY") or ""
+    )
+
+
+def iter_vcard_contacts(file_name):
+    """
+    Parses a vCard file incrementally and yields one Contact per card.
+
+    Supports multiple TEL entries, the first EMAIL, ADR and BDAY.
+    Cards without a name or without any phone number are skipped.
+
+    Parameters:
+    -----------
+    file_name : str
+        The path of the .vcf file.
+
+    Yields:
+    -------
+    Contact
+    """
+    with open(file_name, "r", encoding="utf-8", errors="replace") as file:
+        card = None
+        for line in _iter_unfolded_lines(file):
+            if not line.strip():
+                continue
+
+            upper_line = line.upper()
+            if upper_line == "BEGIN:VCARD":
+                card = {"TEL": []}
+                continue
+            if upper_line == "END:VCARD":
+                if card is not None:
+                    contact = _contact_from_vcard(card)
+                    if contact is not None:
+                        yield contact
+                card = None
+                continue
+            if card is None or ":" not in line:
+                continue
+
+            # Split "item1.TEL;TYPE=CELL:+49..." into property, parameters and value
+            head, value = line.split(":", 1)
+            params = head.split(";")
+            prop = params[0].split(".")[-1].upper()
+            if any(p.upper() in ("ENCODING=QUOTED-PRINTABLE", "QUOTED-PRINTABLE") for p in params[1:]):
+                value = quopri.decodestring(value.encode("latin-1", "replace")).decode("utf-8", "replace")
+
+            if prop == "TEL":
+                phone = value.strip()
+                if phone.lower().startswith("tel:"):
+                    phone = phone[4:]
+                if phone:
+                    card["TEL"].append(phone)
+            elif prop == "FN":
+                card["FN"] = _unescape_vcard_value(value).strip()
+            elif prop == "N" and "N" not in card:
+                # N is "family;given;additional;prefix;suffix"
+                parts = _split_vcard_components(value) + [""] * 2
+                card["N"] = " ".join(p for p in (parts[1], parts[0]) if p)
+            elif prop == "EMAIL" and "EMAIL" not in card:
+                card["EMAIL"] = value.strip()
+            elif prop == "ADR" and "ADR" not in card:
+                card["ADR"] = _format_vcard_address(value)
+            elif prop == "BDAY":
+                card["BDAY"] = _normalize_birthday(value)
+
+
+def _find_column(fieldnames, candidates):
+    """Returns the first header in 'fieldnames' matching one of the candidates."""
+    for field in fieldnames:
+        if field and field.strip().lower() in candidates:
+            return field
+    return None
+
+
+def iter_csv_contacts(file_name):
+    """
+    Parses a CSV file row by row and yields one Contact per row.
+
+    The header row is matched case-insensitively: a "name" column (or
+    "first name"/"last name"), any column containing "phone", "mobile" or
+    "tel", plus optional email, address and birthday columns.
+    Rows without a name or without any phone number are skipped.
+
+    Parameters:
+    -----------
+    file_name : str
+        The path of the .csv file.
+
+    Yields:
+    -------
+    Contact
+    """
+    with open(file_name, "r", encoding="utf-8-sig", newline="") as file:
+        reader = csv.DictReader(file)
+        fieldnames = reader.fieldnames or []
+
+        name_col = _find_column(fieldnames, CSV_NAME_COLUMNS)
+        first_col = _find_column(fieldnames, CSV_FIRST_NAME_COLUMNS)
+        last_col = _find_column(fieldnames, CSV_LAST_NAME_COLUMNS)
+        email_col = _find_column(fieldnames, CSV_EMAIL_COLUMNS)
+        address_col = _find_column(fieldnames, CSV_ADDRESS_COLUMNS)
+        birthday_col = _find_column(fieldnames, CSV_BIRTHDAY_COLUMNS)
+        phone_cols = [
+            field for field in fieldnames
+            if field and any(key in field.lower() for key in ("phone", "mobile", "tel"))
+            and "type" not in field.lower()
+        ]
+
+        for row in reader:
+            if name_col:
+                name = row.get(name_col) or ""
+            else:
+                name = " ".join(
+                    (row.get(col) or "").strip() for col in (first_col, last_col) if col
+                )
+            name = " ".join(name.split()).lower()
+
+            phones = []
+            for col in phone_cols:
+                for phone in re.split(CSV_PHONE_SEPARATORS, row.get(col) or ""):
+                    if phone:
+                        phones.append(phone)
+
+            if not name or not phones:
+                continue
+
+            yield Contact(
+                name=name,
+                phones=phones,
+                email=(row.get(email_col) or "").strip().lower() if email_col else "",
+                address=(row.get(address_col) or "").strip() if address_col else "",
+                birthday=_normalize_birthday(row.get(birthday_col) or "") if birthday_col else ""
+            )
@@ -1,9 +1,42 @@
+import functools
 import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from itertools import islice
 from modules.backup_manager import BackupManager
-from modules.contact import Contact
+from modules.backup_worker import BackupWorker
+from modules.birthday_index import BirthdayIndex
+from modules.change_log import ChangeLog, replay
+from modules.contact import Contact, contacts_to_json
+from modules.contact_diff import diff_contacts
+from modules.field_index import HashIndex
+from modules.name_index import NameIndex
+from modules.phone_store import PhoneStore
+from modules.query import (
+    BirthdayIndexAccess, HashIndexAccess, NameIndexAccess, QueryPlanner,
+    address_tokens, email_domain, parse_query
+)
+from modules.sync import SequenceIndex, SyncState, record_key, tombstone_key
+from modules.undo_stack import UndoStack, UndoStep
 import utils.helper_functions as hf
 
 
+def synchronized(method):
+    """
+    Runs a ContactManager method while holding the manager's lock, so
+    concurrent callers (threads) see and leave consistent contacts, indexes
+    and files. The lock is taken after loading, so a caller never holds it
+    while the loading thread needs the contacts.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.wait_until_loaded()
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class ContactManager:
     """
@@ -11,27 +44,176 @@ class ContactManager:
     Also provides functionality for backup and restoration of contacts.
     """
     
-    def __init__(self, db_name="contacts.json", backup_folder="backups/"):
+    def __init__(
+        self,
+        db_name="contacts.json",
+        backup_folder="backups/",
+        change_log_file=None,
+        shard_count=None,
+        lazy_load=False,
+        undo_depth=50,
+        undo_max_bytes=1024 * 1024,
+        search_cache_size=128,
+        background_backups=False
+    ):
         """
         The constructor initializes the BackupManager and loads the contacts
         from the specified JSON file.
+
+        Every add, update, delete and restore is recorded in a change log
+        (default: '<db_name without extension>_changes.jsonl').
+
+        If 'shard_count' is given, 'db_name' is a directory in which the
+        contacts are split into that many shard files (see ShardedStorage),
+        and a save only rewrites the shards that changed.
+
+        With 'lazy_load=True' the contacts are loaded in a background thread,
+        so the caller can draw its UI immediately. Every access to the
+        contacts waits until loading has finished.
+
+        Saved changes can be undone and redone (see undo() and redo()). The
+        history keeps at most 'undo_depth' steps and 'undo_max_bytes' bytes.
+
+        The results of the last 'search_cache_size' search terms are cached
+        until the next change of the contacts.
+
+        Deleted contacts and the synchronization state (see modules/sync.py)
+        are kept in '<db_name without extension>_sync.json'.
+
+        With 'background_backups=True' the backups after a save are created
+        by a BackupWorker thread; call close() before discarding the manager.
+
+        The public methods can be called from several threads: changes, saves
+        and index lookups are serialized by a lock.
         """
         self.db_name = db_name
+        self.storage = None
+        if shard_count:
+            from modules.sharded_storage import ShardedStorage  # Only needed with shards
+
+            self.storage = ShardedStorage(db_name, shard_count)
+        self._dirty_shards = set()  # Shards changed since the last save
         # Initialize the BackupManager with the backup folder
         self.backup_manager = BackupManager(backup_folder)
-        self.contacts = []  # Initialize an empty list to hold contacts
-        self.load_contacts()  # Load contacts from the database file
+        self._lock = threading.RLock()  # Held by the methods marked @synchronized
+        self._io_lock = threading.Lock()  # Held while the database file is written
+        self._saved_at = None  # The time the database file was last written
+        self.backup_worker = BackupWorker(self.backup_manager, self._io_lock) if background_backups else None
+        self.change_log = ChangeLog(
+            change_log_file or os.path.splitext(db_name)[0] + "_changes.jsonl"
+        )
+        self.sync_state = SyncState(os.path.splitext(db_name)[0] + "_sync.json")
+        self._clock = 0  # The highest contact version seen (logical clock)
+        self._seq = 0  # The sequence number of the last local change
+        self._loaded = threading.Event()  # Set once the contacts are loaded
+        self._loader = None  # The thread loading the contacts
+        self._contacts = []  # Initialize an empty list to hold contacts
+        self.undo_stack = UndoStack(undo_depth, undo_max_bytes)
+        self._pending_undo = []  # Inverse operations of the unsaved changes
+        self._deferred_log = None  # Collects change log entries during bulk updates
+        # Every change of the contacts increments the generation, which
+        # invalidates the cached search results of older generations
+        self.generation = 0
+        self._search_cache = OrderedDict()  # (generation, results) by search term
+        self.search_cache_size = search_cache_size
+        self.search_cache_hits = 0
+        self.search_cache_misses = 0
+        self.birthday_index = BirthdayIndex()  # Contacts sorted by (month, day) of birthday
+        self.name_index = NameIndex()  # Contacts sorted by name
+        self.email_index = HashIndex(lambda contact: [(contact.email or "").lower()])
+        self.email_domain_index = HashIndex(lambda contact: [email_domain(contact.email)])
+        self.phone_store = PhoneStore()  # Interned phone numbers, freed with the manager
+        self.phone_index = HashIndex(lambda contact: contact.phones.normalized())
+        self.address_token_index = HashIndex(lambda contact: address_tokens(contact.address))
+        self.postal_code_index = HashIndex(lambda contact: [contact.address_parts["postal_code"]])
+        self.city_index = HashIndex(lambda contact: [contact.address_parts["city"].lower()])
+        self.id_index = HashIndex(lambda contact: [contact.id])
+        self.seq_index = SequenceIndex()  # Contacts ordered by their last change
+        self._indexes = [
+            self.birthday_index, self.name_index, self.email_index,
+            self.email_domain_index, self.phone_index, self.address_token_index,
+            self.postal_code_index, self.city_index, self.id_index, self.seq_index
+        ]
+        # The query planner answers conditions on these fields from the indexes
+        self.query_planner = QueryPlanner(lambda: self.contacts, {
+            "name": NameIndexAccess(self.name_index),
+            "email": HashIndexAccess(self.email_index),
+            "email_domain": HashIndexAccess(self.email_domain_index),
+            "phone": HashIndexAccess(self.phone_index),
+            "address_token": HashIndexAccess(self.address_token_index),
+            "postal_code": HashIndexAccess(self.postal_code_index, prefix=True),
+            "city": HashIndexAccess(self.city_index),
+            "birthday": BirthdayIndexAccess(self.birthday_index),
+            "birthday_month": BirthdayIndexAccess(self.birthday_index),
+        })
+        if lazy_load:
+            # Load in the background, so startup doesn't wait for the parsing
+            threading.Thread(target=self._load_in_background, daemon=True).start()
+        else:
+            self._load_in_background()
+
+    @property
+    def contacts(self):
+        """The list of contacts. Waits until the contacts are loaded."""
+        self.wait_until_loaded()
+        return self._contacts
+
+    @contacts.setter
+    def contacts(self, contacts):
+        self._contacts = contacts
+
+    def _load_in_background(self):
+        """Loads the contacts and signals the end of loading, even on errors."""
+        # The loading thread itself must not wait for the end of loading
+        self._loader = threading.current_thread()
+        try:
+            self.load_contacts()
+        finally:
+            self._loaded.set()
+
+    @property
+    def is_loaded(self):
+        """True once the contacts (and indexes) are loaded."""
+        return self._loaded.is_set()
+
+    def wait_until_loaded(self, timeout=None):
+        """
+        Blocks until the contacts are loaded.
+
+        Parameters:
+        -----------
+        timeout : float, optional
+            The maximum number of seconds to wait (default is no limit).
+
+        Returns:
+        --------
+        bool
+            True if the contacts are loaded.
+        """
+        if self._loaded.is_set() or threading.current_thread() is self._loader:
+            return True
+        hf.show_info_message("Loading contacts...")
+        return self._loaded.wait(timeout)
 
     def load_contacts(self):
         """Loads contacts from the JSON database file, if it exists."""
+        self._clear_undo()
         try:
-            # Read contacts from the file
-            self.contacts = self._read_from_file(self.db_name)
+            # Read contacts from the shards or the file
+            if self.storage is not None:
+                self.contacts = self.storage.load(phone_store=self.phone_store)
+            else:
+                self.contacts = self._read_from_file(self.db_name)
         except FileNotFoundError:
             hf.show_error_message(
                 f"Error: The file '{self.db_name}' was not found."
             )
+        self._rebuild_indexes()
 
+        # Continue the clocks after the highest stored values
+        tombstone_version, tombstone_seq = self.sync_state.max_values()
+        self._clock = max([contact.version for contact in self._contacts] + [tombstone_version])
+        self._seq = max([contact.seq for contact in self._contacts] + [tombstone_seq])
 
     def _read_from_file(self, file_name):
         """
@@ -51,7 +233,7 @@ class ContactManager:
                 contacts_list = json.load(file)  # Load JSON data from the file
                 
                 # Convert JSON to Contact objects
-                return [Contact(**data) for data in contacts_list]
+                return [Contact.from_dict(data, self.phone_store) for data in contacts_list]
 
         except FileNotFoundError:
             hf.show_warning_message(
@@ -89,8 +271,20 @@ class ContactManager:
             The list of contact objects to write.
         """
         try:
-            with open(file_name, "w", encoding="utf-8") as file:
-                json.dump([contact.to_dict() for contact in data], file, indent=4)
+            saved_at = datetime.now()
+            # Splice the cached JSON of unchanged contacts into one write
+            content = contacts_to_json(data)
+            # Write a temporary file and swap it in, so readers in other
+            # processes see either the old or the new file, never a partial one
+            tmp_path = file_name + ".tmp"
+            with self._io_lock:
+                with open(tmp_path, "w", encoding="utf-8") as file:
+                    file.write(content)
+                os.replace(tmp_path, file_name)
+                # Backups of the file are stamped with the time of this save
+                self._saved_at = saved_at
+                if self.backup_worker is not None:
+                    self.backup_worker.saved_at = saved_at
 
         except FileNotFoundError:
             hf.show_error_message(
@@ -105,6 +299,7 @@ class ContactManager:
                 f"An unexpected error occurred: {str(e)}"
             )
 
+    @synchronized
     def save_contacts(self, create_backup=True):
         """
         Saves contacts to the database and optionally creates a backup.
@@ -114,14 +309,327 @@ class ContactManager:
         create_backup : bool, optional
             If True, creates a backup after saving (default is True).
         """
-        # Write the current contacts to the database file
-        self._write_to_file(self.db_name, self.contacts)
+        # Write the current contacts to the database file (or the changed shards)
+        if self.storage is not None:
+            self._write_shards()
+        else:
+            self._write_to_file(self.db_name, self.contacts)
         
+        self.sync_state.save()
+
+        # The changes of this save become one undo step
+        if self._pending_undo:
+            self.undo_stack.push(UndoStep(self._pending_undo, _describe_ops(self._pending_undo)))
+            self._pending_undo = []
+
         # If create_backup is True, create a backup of the contacts file
         if create_backup:
-            self.backup_manager.create_backup(self.db_name)
+            if self.backup_worker is not None:
+                self._schedule_backup()
+            else:
+                self.create_backup()
 
-            
+    def _write_shards(self):
+        """
+        Writes only the shards that changed since the last save.
+        """
+        try:
+            self.storage.save(self.contacts, self._dirty_shards)
+            self._dirty_shards.clear()
+        except IOError:
+            hf.show_error_message(
+                f"Error: I/O error while writing to '{self.db_name}'."
+            )
+
+    def _mark_dirty(self, contact):
+        """
+        Remembers that the shard holding the contact has to be written.
+        """
+        if self.storage is not None:
+            self._dirty_shards.add(self.storage.shard_for(contact))
+
+    @synchronized
+    def flush(self):
+        """
+        Writes changes that haven't been saved yet and waits for scheduled
+        backups, e.g. before the manager is discarded or the program exits.
+        """
+        if self._pending_undo or self._dirty_shards:
+            self.save_contacts(create_backup=False)
+        self.wait_for_backups()
+
+    def close(self):
+        """
+        Writes pending changes, creates the scheduled backups and stops the
+        backup worker. Call it before the manager is discarded, so no worker
+        thread is left running.
+        """
+        self.flush()
+        if self.backup_worker is not None:
+            self.backup_worker.stop()
+
+    def wait_for_backups(self):
+        """
+        Blocks until the backups scheduled on the background worker exist.
+        """
+        if self.backup_worker is not None:
+            self.backup_worker.flush()
+
+    def _schedule_backup(self):
+        """
+        Hands a backup to the background worker without waiting for it.
+        """
+        if self.storage is not None:
+            # Splicing cached fragments is cheap; the worker must not read
+            # contacts that the caller may change meanwhile
+            saved_at = datetime.now()
+            content = contacts_to_json(self.contacts).encode("utf-8")
+            self.backup_worker.submit(self.db_name, content, saved_at)
+        else:
+            self.backup_worker.submit(self.db_name)
+
+    @synchronized
+    def create_backup(self):
+        """
+        Creates a backup of the contacts database.
+
+        Returns:
+        --------
+        str or None
+            The backup filename, or None if the backup failed.
+        """
+        self.wait_for_backups()  # Keep the order of the backups
+        if self.storage is not None:
+            # There is no single file to copy, so back up the serialized list
+            saved_at = datetime.now()
+            content = contacts_to_json(self.contacts)
+            return self.backup_manager.create_backup(self.db_name, content.encode("utf-8"), saved_at)
+        with self._io_lock:
+            try:
+                with open(self.db_name, "rb") as file:
+                    content = file.read()
+                    saved_at = self._saved_at or datetime.fromtimestamp(os.fstat(file.fileno()).st_mtime)
+            except OSError:
+                # Let the backup manager report the missing file
+                return self.backup_manager.create_backup(self.db_name)
+        return self.backup_manager.create_backup(self.db_name, content, saved_at)
+
+    def _rebuild_indexes(self):
+        """
+        Rebuilds all indexes from the current contact list.
+        """
+        self._bump_generation()
+        for index in self._indexes:
+            index.rebuild(self.contacts)
+
+    def _bump_generation(self):
+        """
+        Marks the contacts as changed, so cached search results are not used again.
+        """
+        self.generation += 1
+        self._search_cache.clear()
+
+    def _index_contact(self, contact):
+        """
+        Adds a contact to all indexes.
+        """
+        for index in self._indexes:
+            index.add(contact)
+
+    def _unindex_contact(self, contact):
+        """
+        Removes a contact from all indexes.
+        """
+        for index in self._indexes:
+            index.remove(contact)
+
+    def _stamp(self, contact, version=None):
+        """
+        Gives a changed contact the next sequence number and a new version
+        (or the given version of a change received from another database).
+        """
+        self._clock = max(self._clock + 1, version or 0)
+        self._seq += 1
+        contact.version = version if version is not None else self._clock
+        contact.seq = self._seq
+
+    def _insert_contacts(self, contacts, version=None):
+        """
+        Appends contacts to the list and records them in the change log.
+        """
+        self._adopt(contacts)
+        self.contacts.extend(contacts)
+        self._bump_generation()
+        for contact in contacts:
+            self._stamp(contact, version)
+            self.sync_state.discard_tombstone(contact.id)
+            self._index_contact(contact)
+            self._mark_dirty(contact)
+        self.change_log.record_many(
+            ("add", contact.name, contact.to_dict(), None) for contact in contacts
+        )
+        if contacts:
+            self._pending_undo.append(("remove", list(contacts)))
+
+    def _adopt(self, contacts):
+        """Moves the phone numbers of contacts created elsewhere into the manager's store."""
+        for contact in contacts:
+            contact.use_phone_store(self.phone_store)
+
+    def _modify_contact(self, contact, changes, version=None):
+        """
+        Sets new field values on a contact and records the changed fields.
+
+        Parameters:
+        -----------
+        contact : Contact
+            The contact to modify.
+        changes : dict
+            New values by field name (see Contact.FIELDS).
+        version : int, optional
+            The version of a change received from another database.
+
+        Returns:
+        --------
+        bool
+            True if at least one field changed.
+        """
+        changed = {
+            field: list(value) if field == "phones" else value
+            for field, value in changes.items()
+            if getattr(contact, field) != value
+        }
+        if not changed:
+            return False
+
+        original_name = contact.name
+        # Plain previous values, e.g. the phones as a list instead of a view of the contact
+        current = contact.to_dict()
+        previous = {field: current[field] for field in changed}
+        self._bump_generation()
+        self._unindex_contact(contact)
+        self._mark_dirty(contact)  # A new name may move the contact to another shard
+        for field, value in changed.items():
+            setattr(contact, field, value)
+        self._stamp(contact, version)
+        self._index_contact(contact)
+        self._mark_dirty(contact)
+        if self._deferred_log is not None:
+            self._deferred_log.append(("update", original_name, changed, None))
+        else:
+            self.change_log.record("update", original_name, changed)
+        self._pending_undo.append(("modify", contact, previous))
+        return True
+
+    def _remove_contacts(self, contacts, version=None):
+        """
+        Removes the given contacts from the list and records the deletions.
+        Each deleted contact leaves a tombstone for synchronization.
+        """
+        removed_ids = {id(contact) for contact in contacts}
+        self.contacts = [contact for contact in self.contacts if id(contact) not in removed_ids]
+        self._bump_generation()
+        for contact in contacts:
+            self._unindex_contact(contact)
+            self._mark_dirty(contact)
+            self._clock = max(self._clock + 1, version or 0)
+            self._seq += 1
+            self.sync_state.add_tombstone(
+                contact.id, version if version is not None else self._clock, self._seq, contact.name
+            )
+        self.change_log.record_many(
+            ("delete", contact.name, None, None) for contact in contacts
+        )
+        if contacts:
+            self._pending_undo.append(("insert", list(contacts)))
+
+    def _replace_contacts(self, contacts, **restore_info):
+        """
+        Replaces the whole contact list (restore) and records where it came from.
+
+        For synchronization every restored contact counts as changed, and
+        contacts missing from the restored list count as deleted.
+        """
+        self._adopt(contacts)
+        restored_ids = {contact.id for contact in contacts}
+        for contact in self.contacts:
+            if contact.id not in restored_ids:
+                self._clock += 1
+                self._seq += 1
+                self.sync_state.add_tombstone(contact.id, self._clock, self._seq, contact.name)
+        for contact in contacts:
+            self._stamp(contact)
+            self.sync_state.discard_tombstone(contact.id)
+
+        self.contacts = contacts
+        self._rebuild_indexes()
+        if self.storage is not None:
+            self._dirty_shards.update(range(self.storage.shard_count))
+        self.change_log.record("restore", **restore_info)
+        # A restore replaces every contact and can't be undone step by step
+        self._clear_undo()
+
+    def _clear_undo(self):
+        """
+        Forgets the undo and redo history.
+        """
+        self.undo_stack.clear()
+        self._pending_undo = []
+
+    def _apply_ops(self, ops):
+        """
+        Applies inverse operations in reverse order and returns their own
+        inverse operations (to redo what was undone, and vice versa).
+        """
+        self._pending_undo = []
+        for op in reversed(ops):
+            if op[0] == "remove":
+                self._remove_contacts(op[1])
+            elif op[0] == "insert":
+                self._insert_contacts(op[1])
+            else:
+                self._modify_contact(op[1], op[2])
+        inverse, self._pending_undo = self._pending_undo, []
+        return inverse
+
+    @synchronized
+    def undo(self):
+        """
+        Reverts the most recent saved change (add, update, delete or import).
+
+        Only the contacts touched by the change are modified, so undoing takes
+        the same time regardless of the size of the database.
+
+        Returns:
+        --------
+        str or None
+            The description of the reverted change, or None if there is none.
+        """
+        step = self.undo_stack.pop_undo()
+        if step is None:
+            return None
+        self.undo_stack.push_redo(UndoStep(self._apply_ops(step.ops), step.label))
+        self.save_contacts(create_backup=False)
+        return step.label
+
+    @synchronized
+    def redo(self):
+        """
+        Repeats the most recently undone change.
+
+        Returns:
+        --------
+        str or None
+            The description of the repeated change, or None if there is none.
+        """
+        step = self.undo_stack.pop_redo()
+        if step is None:
+            return None
+        self.undo_stack.push_redone(UndoStep(self._apply_ops(step.ops), step.label))
+        self.save_contacts(create_backup=False)
+        return step.label
+
+    @synchronized
     def add_contact(self, name, phones, email=None, address=None, birthday=None):
         """
         Adds a new contact if the name or email is not a duplicate.
@@ -145,14 +653,145 @@ class ContactManager:
         hf.show_success_message("\nNew contact created:")
         hf.show_info_message(f"{new_contact}")
         
-        self.contacts.append(new_contact)
+        self._insert_contacts([new_contact])
         
         # Save changes and optionally create a backup
         self.save_contacts()
 
-    def display_contacts_table(self):
+    @synchronized
+    def import_contacts(self, contacts, chunk_size=1000):
+        """
+        Imports contacts from an iterable (e.g. a streaming vCard/CSV parser)
+        in chunks and saves the database only once at the end.
+
+        Contacts whose name or email already exists are skipped. If the
+        iterable raises an error (e.g. a parse error in a later part of the
+        file), the contacts inserted so far are removed again and the error
+        is raised, so a failed import changes nothing.
+
+        Parameters:
+        -----------
+        contacts : iterable
+            An iterable of Contact objects. It is consumed lazily.
+        chunk_size : int, optional
+            Number of contacts taken from the iterable per chunk (default is 1000).
+
+        Returns:
+        --------
+        tuple
+            (imported, skipped) counts.
+        """
+        # Build lookup sets once instead of scanning the list per contact
+        existing_names = {contact.name for contact in self.contacts}
+        existing_emails = {contact.email for contact in self.contacts if contact.email}
+
+        imported = 0
+        skipped = 0
+        iterator = iter(contacts)
+        undo_mark = len(self._pending_undo)
+
+        try:
+            while True:
+                chunk = list(islice(iterator, chunk_size))
+                if not chunk:
+                    break
+
+                new_contacts = []
+                for contact in chunk:
+                    if contact.name in existing_names or (contact.email and contact.email in existing_emails):
+                        skipped += 1
+                        continue
+
+                    existing_names.add(contact.name)
+                    if contact.email:
+                        existing_emails.add(contact.email)
+                    new_contacts.append(contact)
+
+                self._insert_contacts(new_contacts)
+                imported += len(new_contacts)
+        except Exception:
+            # Remove the chunks inserted so far, like an undo of the import
+            earlier_undo = self._pending_undo[:undo_mark]
+            self._apply_ops(self._pending_undo[undo_mark:])
+            self._pending_undo = earlier_undo
+            raise
+
+        # Single save (and backup) for the whole import
+        if imported:
+            self.save_contacts()
+        return imported, skipped
+
+    def import_contacts_from_file(self, file_name, chunk_size=1000):
+        """
+        Imports contacts from a vCard (.vcf) or CSV file.
+
+        Parameters:
+        -----------
+        file_name : str
+            The path of the file to import.
+        chunk_size : int, optional
+            Number of parsed contacts added per chunk (default is 1000).
+
+        Returns:
+        --------
+        tuple or None
+            (imported, skipped) counts, or None if the import failed (then
+            no contact was imported).
+        """
+        # The importer (and the csv module) is only loaded when needed
+        import csv
+        from modules.contact_importer import iter_contacts_from_file
+
+        try:
+            contacts = iter_contacts_from_file(file_name)
+            imported, skipped = self.import_contacts(contacts, chunk_size=chunk_size)
+        except ValueError as e:
+            hf.show_error_message(f"Error: {str(e)} (no contacts were imported)")
+            return None
+        except FileNotFoundError:
+            hf.show_error_message(f"Error: The file '{file_name}' was not found.")
+            return None
+        except (IOError, csv.Error) as e:
+            hf.show_error_message(f"Error: Could not read '{file_name}': {str(e)} (no contacts were imported)")
+            return None
+
+        hf.show_success_message(
+            f"Import finished: {imported} contact(s) imported, {skipped} skipped."
+        )
+        return imported, skipped
+
+    def _display_pages(self, print_contact, page_size):
         """
-        Displays contacts in a table format.
+        Prints all contacts in alphabetical order, one page at a time, using
+        the cursor-based pagination of the name index.
+
+        Parameters:
+        -----------
+        print_contact : callable
+            Called with (number, contact) for each contact.
+        page_size : int
+            The number of contacts per page.
+        """
+        self.wait_until_loaded()
+        cursor = None
+        number = 1
+        while True:
+            with self._lock:
+                page, cursor = self.name_index.page(cursor, page_size)
+            for contact in page:
+                print_contact(number, contact)
+                number += 1
+
+            # Stop after the last page or if the user doesn't want more
+            if cursor is None:
+                break
+            more = input(f"\nPress Enter for the next {page_size} contacts or '0' to stop: ").strip()
+            if more == "0":
+                break
+
+    def display_contacts_table(self, page_size=20):
+        """
+        Displays contacts in a table format, sorted by name and paginated.
         """
         hf.show_title(f"Displaying {len(self.contacts)} contact(s):")
                     
@@ -162,10 +801,10 @@ class ContactManager:
         print("=" * len(header))
 
         # Print each contact in table format
-        for index, contact in enumerate(self.contacts, start=1):
+        def print_row(index, contact):
             
             # Show first phone on the same line
-            phones_str = hf.format_phone_number(contact.phones[0])
+            phones_str = contact.phones.formatted()[0]
             print(f"{index:<5} {contact.name:^15} {phones_str:^25} {contact.email or '-':^25} {contact.address or '-':^30} {contact.birthday or '-':^18}")
 
             # Show additional phone numbers on separate lines
@@ -175,13 +814,16 @@ class ContactManager:
             # Divider after each contact
             print("-" * len(header))
 
-    def display_contacts_one_by_one(self):
+        self._display_pages(print_row, page_size)
+
+    def display_contacts_one_by_one(self, page_size=20):
         """
-        Displays contacts one by one with full details.
+        Displays contacts one by one with full details, sorted by name and paginated.
         """
         hf.show_title(f"Displaying {len(self.contacts)} contact(s):")
-        for contact in self.contacts:
-            phones_str = ", ".join([hf.format_phone_number(phone) for phone in contact.phones])
+
+        def print_details(index, contact):
+            phones_str = ", ".join(contact.phones.formatted())
             print(f"{'-'*40}")
             print(f"Name:      {contact.name.title()}")
             print(f"Phones:    {phones_str}")
@@ -190,6 +832,8 @@ class ContactManager:
             print(f"Birthday:  {contact.birthday if contact.birthday else '-'}")
             print(f"{'-'*40}\n")
 
+        self._display_pages(print_details, page_size)
+
     def show_contacts(self):
         """
         Displays all saved contacts. Provides two viewing themes: table format or one by one.
@@ -223,6 +867,60 @@ class ContactManager:
                     # Handle invalid view option choice
                     hf.show_warning_message("Invalid choice. Please select '1', '2', or '0' to cancel.")
 
+    @synchronized
+    def contacts_by_prefix(self, prefix):
+        """
+        Finds contacts whose name starts with 'prefix' using the name index.
+
+        Parameters:
+        -----------
+        prefix : str
+            The beginning of the name (case-insensitive).
+
+        Returns:
+        --------
+        list
+            The matching contacts in alphabetical order.
+        """
+        return self.name_index.prefix(prefix.strip())
+
+    def iter_contacts_sorted(self, start=""):
+        """
+        Iterates over the contacts in alphabetical order, starting at the first
+        name equal to or greater than 'start'.
+
+        The lock is held for each step only, so other threads can change the
+        contacts between steps (the iteration continues after the last name).
+        """
+        self.wait_until_loaded()
+        contacts = self.name_index.iter_from(start)
+        while True:
+            with self._lock:
+                contact = next(contacts, None)
+            if contact is None:
+                return
+            yield contact
+
+    @synchronized
+    def contacts_page(self, cursor=None, limit=20):
+        """
+        Returns one page of contacts in alphabetical order.
+
+        Parameters:
+        -----------
+        cursor : tuple, optional
+            The cursor returned with the previous page (default is the first page).
+        limit : int, optional
+            The maximum number of contacts per page (default is 20).
+
+        Returns:
+        --------
+        tuple
+            (contacts, next_cursor). next_cursor is None on the last page.
+        """
+        return self.name_index.page(cursor, limit)
+
+    @synchronized
     def search_contact(self, search_term):
         """
         Searches for contacts by name.
@@ -240,10 +938,284 @@ class ContactManager:
         # Normalize the search term by converting it to lowercase and removing spaces
         search_term = search_term.lower().strip()
         
+        # Use the cached results if the contacts didn't change since
+        cached = self._search_cache.get(search_term)
+        if cached is not None and cached[0] == self.generation:
+            self.search_cache_hits += 1
+            self._search_cache.move_to_end(search_term)
+            return list(cached[1])
+        self.search_cache_misses += 1
+        
         # Find contacts where the search term is part of the name
+        generation = self.generation
         results = [contact for contact in self.contacts if search_term in contact.name.lower()]
-        return results
+        
+        if self.search_cache_size > 0:
+            self._search_cache[search_term] = (generation, results)
+            self._search_cache.move_to_end(search_term)
+            if len(self._search_cache) > self.search_cache_size:
+                self._search_cache.popitem(last=False)
+        return list(results)
+
+    def iter_search(self, search_term, limit=None, offset=0):
+        """
+        Lazily yields the contacts whose names contain the search term, in the
+        same order as search_contact(), without building a list of all matches.
+        The scan stops as soon as 'limit' matches have been yielded.
+
+        Parameters:
+        -----------
+        search_term : str
+            The term to search for in contact names.
+        limit : int, optional
+            The maximum number of contacts to yield (default is no limit).
+        offset : int, optional
+            The number of matches to skip first (default is 0).
+
+        Returns:
+        --------
+        iterator
+            The matching Contact objects.
+        """
+        search_term = search_term.lower().strip()
+        cached = self._search_cache.get(search_term)
+        if cached is not None and cached[0] == self.generation:
+            self.search_cache_hits += 1
+            matches = iter(cached[1])
+        else:
+            self.search_cache_misses += 1
+            matches = (contact for contact in self.contacts if search_term in contact.name.lower())
+        return islice(matches, offset, None if limit is None else offset + limit)
+
+    def iter_contacts(self, limit=None, offset=0, start=""):
+        """
+        Lazily yields contacts in alphabetical order (see iter_contacts_sorted).
+
+        Parameters:
+        -----------
+        limit : int, optional
+            The maximum number of contacts to yield (default is no limit).
+        offset : int, optional
+            The number of contacts to skip first (default is 0).
+        start : str, optional
+            The name to start from (default is the beginning).
+
+        Returns:
+        --------
+        iterator
+            The Contact objects.
+        """
+        contacts = self.iter_contacts_sorted(start)
+        return islice(contacts, offset, None if limit is None else offset + limit)
+
+    def search_cache_info(self):
+        """
+        Returns the statistics of the search result cache.
+
+        Returns:
+        --------
+        dict
+            The "hits", "misses", current "size" and "max_size" of the cache.
+        """
+        return {
+            "hits": self.search_cache_hits,
+            "misses": self.search_cache_misses,
+            "size": len(self._search_cache),
+            "max_size": self.search_cache_size,
+        }
+
+    @synchronized
+    def query(self, query):
+        """
+        Finds contacts matching all conditions of a query, using the indexes
+        for the most selective conditions.
+
+        Parameters:
+        -----------
+        query : str or list
+            A query like "email_domain = company.de AND phone_count > 1", or a
+            list of Condition objects (see modules.query).
+
+        Returns:
+        --------
+        list
+            The matching contacts, sorted by name.
+
+        Raises:
+        -------
+        ValueError
+            If the query can't be parsed.
+        """
+        self.wait_until_loaded()
+        conditions = parse_query(query) if isinstance(query, str) else query
+        return self.query_planner.execute(conditions)
+
+    @synchronized
+    def explain_query(self, query):
+        """
+        Describes how a query would be executed (indexes used and residual filters).
+
+        Returns:
+        --------
+        str
+            A one-line description of the query plan.
+        """
+        self.wait_until_loaded()
+        conditions = parse_query(query) if isinstance(query, str) else query
+        return self.query_planner.plan(conditions).describe()
+
+    @synchronized
+    def contacts_in_city(self, city):
+        """
+        Returns the contacts whose address is in the given city, using the city index.
+        """
+        return sorted(self.city_index.get(city.strip().lower()), key=lambda contact: contact.name.lower())
 
+    @synchronized
+    def contacts_in_region(self, postal_code_prefix):
+        """
+        Returns the contacts whose postal code starts with the given prefix
+        (e.g. "41" for the region around Neuss), using the postal code index.
+        """
+        prefix = postal_code_prefix.strip()
+        contacts = set()
+        for postal_code in self.postal_code_index.keys():
+            if postal_code.startswith(prefix):
+                contacts.update(self.postal_code_index.get(postal_code))
+        return sorted(contacts, key=lambda contact: contact.name.lower())
+
+    @synchronized
+    def count_by_city(self):
+        """
+        Counts contacts per city from the city index, without scanning the contacts.
+
+        Returns:
+        --------
+        dict
+            {city: number of contacts}, largest first.
+        """
+        counts = {city: self.city_index.count(city) for city in self.city_index.keys()}
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+    def _matching_contacts(self, predicate):
+        """
+        Returns the contacts matching a predicate: a query string or list of
+        conditions (answered with the indexes, see query()) or a callable
+        that is called with each contact.
+        """
+        if isinstance(predicate, (str, list, tuple)):
+            return self.query(list(predicate) if isinstance(predicate, tuple) else predicate)
+        return [contact for contact in self.contacts if predicate(contact)]
+
+    def _check_unique_changes(self, matches, changes):
+        """
+        Raises a ValueError if setting 'changes' on all 'matches' would give
+        two contacts the same name or the same email.
+        """
+        matched_ids = {contact.id for contact in matches}
+        for field in ("name", "email"):
+            value = changes.get(field)
+            if field not in changes or not value:
+                continue
+            if len(matches) > 1:
+                raise ValueError(
+                    f"The {field} '{value}' can't be set on {len(matches)} contacts, it must be unique."
+                )
+            if any(getattr(contact, field) == value and contact.id not in matched_ids
+                   for contact in self.contacts):
+                raise ValueError(f"A contact with the {field} '{value}' already exists.")
+
+    @synchronized
+    def update_where(self, predicate, changes, dry_run=False):
+        """
+        Sets the same field values on all matching contacts, with a single
+        save (and backup) at the end.
+
+        Example: update_where("email_domain = old.de", {"email": None})
+
+        Parameters:
+        -----------
+        predicate : str, list or callable
+            A query like "city = neuss", a list of conditions, or a function
+            returning True for the contacts to update.
+        changes : dict
+            New values by field name (see Contact.FIELDS).
+        dry_run : bool, optional
+            Only count the contacts that would change (default is False).
+
+        Returns:
+        --------
+        int
+            The number of changed (or, with dry_run, changing) contacts.
+
+        Raises:
+        -------
+        ValueError
+            If a field is unknown, a value is invalid, the query can't be
+            parsed, or a name or email would no longer be unique. Nothing is
+            changed then.
+        """
+        unknown = set(changes) - set(Contact.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}.")
+        for field, value in changes.items():
+            _check_field_value(field, value)
+
+        matches = self._matching_contacts(predicate)
+        self._check_unique_changes(matches, changes)
+        if dry_run:
+            return sum(
+                1 for contact in matches
+                if any(getattr(contact, field) != value for field, value in changes.items())
+            )
+
+        # Write the change log entries of all contacts at once
+        self._deferred_log = []
+        try:
+            updated = sum(1 for contact in matches if self._modify_contact(contact, changes))
+        finally:
+            entries, self._deferred_log = self._deferred_log, None
+            self.change_log.record_many(entries)
+
+        if updated:
+            self.save_contacts()
+        return updated
+
+    @synchronized
+    def delete_where(self, predicate, dry_run=False):
+        """
+        Deletes all matching contacts without asking, with a single pass over
+        the contact list and a single save (and backup).
+
+        Example: delete_where("phone_count = 0")
+
+        Parameters:
+        -----------
+        predicate : str, list or callable
+            A query, a list of conditions, or a function returning True for
+            the contacts to delete (see update_where).
+        dry_run : bool, optional
+            Only count the contacts that would be deleted (default is False).
+
+        Returns:
+        --------
+        int
+            The number of deleted (or, with dry_run, matching) contacts.
+
+        Raises:
+        -------
+        ValueError
+            If the query can't be parsed.
+        """
+        matches = self._matching_contacts(predicate)
+        if dry_run or not matches:
+            return len(matches)
+
+        self._remove_contacts(matches)
+        self.save_contacts()
+        return len(matches)
+
+    @synchronized
     def update_contact(self, orginal_name, **kwargs):
         """
         Updates a contact's fields dynamically based on provided keyword arguments.
@@ -262,19 +1234,12 @@ class ContactManager:
         """
         for contact in self.contacts:
             if contact.name == orginal_name:
-                # Update contact fields based on provided kwargs           
-                if 'new_name' in kwargs:
-                    contact.name = kwargs['new_name']
-                if 'new_phones' in kwargs:
-                    contact.phones = kwargs['new_phones']
-                if 'new_email' in kwargs:
-                    contact.email = kwargs['new_email']
-                if 'new_address' in kwargs:
-                    contact.address = kwargs['new_address']
-                if 'new_birthday' in kwargs:
-                    contact.birthday = kwargs['new_birthday']
-                if 'new_notes' in kwargs:
-                    contact.notes = kwargs['new_notes']
+                # Update contact fields based on provided kwargs
+                changes = {
+                    field: kwargs[f"new_{field}"]
+                    for field in Contact.FIELDS if f"new_{field}" in kwargs
+                }
+                self._modify_contact(contact, changes)
                 
                 # Save the updated contacts 
                 self.save_contacts()
@@ -302,15 +1267,16 @@ class ContactManager:
             # Valid options for confirmation
             if confirm in ["yes", "ja", "y"]:
                 
-                # Store the original contact list length to check if a deletion occurs
-                contacts_list_length = len(self.contacts)
-                
-                # Update the contacts list to exclude the contact with the given name
-                self.contacts = [contact for contact in self.contacts if contact.name != name]
-                
-                # If the contact was found and removed, save the updated contact list
-                if len(self.contacts) < contacts_list_length:
-                    self.save_contacts()
+                # Find the contacts with the given name (without waiting for
+                # other threads while the user answers)
+                with self._lock:
+                    matches = [contact for contact in self.contacts if contact.name == name]
+                    
+                    # If the contact was found, remove it and save the updated contact list
+                    if matches:
+                        self._remove_contacts(matches)
+                        self.save_contacts()
+                if matches:
                     hf.show_success_message(f"Contact '{name}' deleted successfully.")
                 else:
                     hf.show_error_message(f"Contact '{name}' not found.")
@@ -325,6 +1291,7 @@ class ContactManager:
             else:
                 hf.show_warning_message("Invalid input. Please enter 'y' for yes or 'n' for no.")
                 
+    @synchronized
     def restore_backup(self, backup_filename):
         """
         Restores contacts from a backup file if it exists.
@@ -338,22 +1305,379 @@ class ContactManager:
         --------
         None
         """
+        self.wait_for_backups()
         # Get the backup file path using BackupManager
         backup_file = self.backup_manager.get_backup_file(backup_filename)
 
         # If the backup file exists, restore the contacts
         if backup_file:
             
-            contacts = self._read_from_file(backup_file)
+            # Load the contacts, refusing backups that fail verification
+            contacts = self._load_backup_contacts(backup_filename)
             
             # Wenn Kontakte erfolgreich geladen wurden
             if contacts is not None:
-                self.contacts = contacts
+                self._replace_contacts(contacts, backup=backup_filename)
+                self.save_contacts(create_backup=False)
                 hf.show_info_message("\nRestoring from backup...")
                 hf.show_success_message(f"Backup '{backup_filename}' successfully restored.\n")
             else:
                 hf.show_error_message(f"Failed to restore backup '{backup_filename}'.")
         else:
-            hf.show_error_message(f"Unable to restore backup {backup_filename}.") 
-            
-    
\ No newline at end of file
+            hf.show_error_message(f"Unable to restore backup {backup_filename}.")
+
+    def _load_backup_contacts(self, backup_filename):
+        """
+        Loads the contacts stored in a backup file.
+
+        Returns:
+        --------
+        list or None
+            A list of Contact objects, or None if the backup does not exist
+            or failed verification.
+        """
+        self.wait_for_backups()
+        backup_file = self.backup_manager.get_backup_file(backup_filename)
+        if not backup_file:
+            hf.show_error_message(f"Backup file {backup_filename} not found.")
+            return None
+
+        # Refuse backups that are corrupt, truncated or don't match the schema
+        verification = self.backup_manager.verify_backup(backup_filename)
+        if not verification["ok"]:
+            hf.show_error_message(
+                f"Backup '{backup_filename}' failed verification: {verification['error']}"
+            )
+            return None
+
+        # Backups may be files or members of the backup archive
+        content = self.backup_manager.read_backup(backup_filename)
+        try:
+            return [Contact.from_dict(data) for data in json.loads(content.decode("utf-8"))]
+        except (TypeError, ValueError, KeyError, AttributeError) as e:
+            hf.show_error_message(f"Backup '{backup_filename}' could not be loaded: {str(e)}")
+            return None
+
+    def diff_backup(self, backup_filename):
+        """
+        Compares the current contacts with a backup without changing anything.
+
+        Parameters:
+        -----------
+        backup_filename : str
+            The name of the backup file to compare with.
+
+        Returns:
+        --------
+        dict or None
+            A diff with "added", "removed" and "modified" entries (see
+            modules.contact_diff.diff_contacts), seen from restoring the backup,
+            or None if the backup could not be loaded.
+        """
+        self.wait_for_backups()
+        backup_contacts = self._load_backup_contacts(backup_filename)
+        if backup_contacts is None:
+            return None
+        return diff_contacts(self.contacts, backup_contacts)
+
+    @synchronized
+    def restore_selected_contacts(self, backup_filename, names):
+        """
+        Restores only the chosen contacts from a backup and saves the result.
+
+        A chosen contact that exists only in the backup is added again, one that
+        exists only in the current list is removed, and a modified one gets the
+        field values from the backup. All other contacts stay unchanged.
+
+        Parameters:
+        -----------
+        backup_filename : str
+            The name of the backup file to restore from.
+        names : iterable
+            Names of the contacts to restore (current or backup name).
+
+        Returns:
+        --------
+        int
+            The number of restored contacts.
+        """
+        diff = self.diff_backup(backup_filename)
+        if diff is None:
+            return 0
+
+        selected = {name.strip().lower() for name in names}
+        restored = 0
+
+        added = [contact for contact in diff["added"] if contact.name.lower() in selected]
+        self._insert_contacts(added)
+        restored += len(added)
+
+        removed = [contact for contact in diff["removed"] if contact.name.lower() in selected]
+        if removed:
+            self._remove_contacts(removed)
+            restored += len(removed)
+
+        for current, other, changes in diff["modified"]:
+            if current.name.lower() in selected or other.name.lower() in selected:
+                self._modify_contact(current, {field: getattr(other, field) for field in changes})
+                restored += 1
+
+        if restored:
+            self.save_contacts()
+            hf.show_success_message(f"{restored} contact(s) restored from '{backup_filename}'.")
+        else:
+            hf.show_info_message("No matching changes to restore.")
+        return restored
+
+    def contacts_at(self, timestamp):
+        """
+        Reconstructs the contact list as it was at the given time.
+
+        Starts from the newest backup created at or before 'timestamp' and
+        replays the change log entries between the backup and 'timestamp'.
+        Without such a backup, the whole log is replayed from an empty list.
+
+        Parameters:
+        -----------
+        timestamp : datetime
+            The point in time to reconstruct.
+
+        Returns:
+        --------
+        list or None
+            The Contact objects as of 'timestamp', or None if a required
+            backup failed verification.
+        """
+        self.wait_for_backups()
+        snapshot = self.backup_manager.find_backup_before(timestamp)
+        if snapshot:
+            backup_filename, snapshot_time = snapshot
+            contacts = self._load_backup_contacts(backup_filename)
+            if contacts is None:
+                return None
+        else:
+            contacts, snapshot_time = [], None
+
+        entries = self.change_log.iter_entries(after=snapshot_time, until=timestamp)
+        try:
+            return replay(contacts, entries, self._resolve_restore_entry)
+        except ValueError as e:
+            hf.show_error_message(f"Error: {str(e)}")
+            return None
+
+    def _resolve_restore_entry(self, entry):
+        """
+        Returns the contacts a logged restore switched to (used while replaying).
+        """
+        if "backup" in entry:
+            contacts = self._load_backup_contacts(entry["backup"])
+        else:
+            contacts = self.contacts_at(datetime.fromisoformat(entry["until"]))
+        if contacts is None:
+            raise ValueError("A restore in the change log can't be replayed.")
+        return contacts
+
+    @synchronized
+    def restore_point_in_time(self, timestamp):
+        """
+        Restores the contacts as they were at the given time and saves them.
+
+        Parameters:
+        -----------
+        timestamp : datetime
+            The point in time to restore. Times in the future are treated as now.
+        """
+        timestamp = min(timestamp, datetime.now())
+        contacts = self.contacts_at(timestamp)
+        if contacts is None:
+            hf.show_error_message("Point-in-time restore aborted.")
+            return
+
+        self._replace_contacts(contacts, until=timestamp.isoformat())
+        self.save_contacts(create_backup=False)
+        hf.show_success_message(
+            f"Contacts restored to {timestamp.strftime('%d.%m.%Y %H:%M:%S')} ({len(contacts)} contact(s))."
+        )
+
+    @synchronized
+    def changes_since(self, seq=-1):
+        """
+        Returns the change feed: all contacts and deletions changed after the
+        given sequence number, found in O(log n + k).
+
+        Parameters:
+        -----------
+        seq : int, optional
+            The sequence number returned by the previous call (default is -1,
+            which returns everything).
+
+        Returns:
+        --------
+        dict
+            "replica" (id of this database), "seq" (the current sequence
+            number), "records" (contact dictionaries) and "tombstones"
+            ({"id", "version", "seq", "name"} dictionaries).
+        """
+        self.wait_until_loaded()
+        return {
+            "replica": self.sync_state.replica,
+            "seq": self._seq,
+            "records": [contact.to_dict() for contact in self.seq_index.since(seq)],
+            "tombstones": [
+                dict(tombstone, id=contact_id)
+                for contact_id, tombstone in self.sync_state.tombstones_since(seq)
+            ],
+        }
+
+    @synchronized
+    def apply_changes(self, changes):
+        """
+        Applies a change feed of another database (see changes_since()).
+
+        A received record or deletion replaces the local state of the contact
+        only if it wins the conflict resolution (see modules/sync.py), so
+        applying the same feed twice changes nothing. The caller saves.
+
+        Parameters:
+        -----------
+        changes : dict
+            A change feed returned by changes_since().
+
+        Returns:
+        --------
+        int
+            The number of applied changes.
+        """
+        self.wait_until_loaded()
+        applied = 0
+        for data in changes["records"]:
+            local = next(iter(self.id_index.get(data["id"])), None)
+            tombstone = self.sync_state.tombstones.get(data["id"])
+            if local is not None:
+                local_key = record_key(local.to_dict())
+            elif tombstone is not None:
+                local_key = tombstone_key(tombstone)
+            else:
+                local_key = None
+            if local_key is not None and record_key(data) <= local_key:
+                continue
+
+            fields = {field: data.get(field) for field in Contact.FIELDS}
+            version = data["version"]
+            name = self._claim_name(data["id"], fields["name"])
+            if name != fields["name"]:
+                # The renamed record is a new local change, passed on to the other database
+                fields["name"] = name
+                version = None
+            if local is None:
+                self._insert_contacts([Contact(id=data["id"], **fields)], version=version)
+            elif not self._modify_contact(local, fields, version=version):
+                continue
+            applied += 1
+
+        for tombstone in changes["tombstones"]:
+            local = next(iter(self.id_index.get(tombstone["id"])), None)
+            if local is not None:
+                if tombstone_key(tombstone) > record_key(local.to_dict()):
+                    self._remove_contacts([local], version=tombstone["version"])
+                    applied += 1
+                continue
+            # Keep the newest tombstone, so the deletion is passed on to other databases
+            existing = self.sync_state.tombstones.get(tombstone["id"])
+            if existing is None or tombstone["version"] > existing["version"]:
+                self._clock = max(self._clock, tombstone["version"])
+                self._seq += 1
+                self.sync_state.add_tombstone(tombstone["id"], tombstone["version"], self._seq, tombstone["name"])
+        return applied
+
+    def _claim_name(self, contact_id, name):
+        """
+        Returns the name a received contact can use. Names are unique (see
+        add_contact), so if another contact already has the name, the contact
+        with the larger id is renamed to "<name> (2)", "<name> (3)", ...
+        Both databases pick the same contact, and the rename is synchronized
+        like any other change.
+
+        Parameters:
+        -----------
+        contact_id : str
+            The id of the received contact.
+        name : str
+            The name of the received contact.
+
+        Returns:
+        --------
+        str
+            The name, or a new name if the received contact has to be renamed.
+        """
+        other = next(
+            (contact for contact in self.name_index.prefix(name)
+             if contact.name == name and contact.id != contact_id),
+            None
+        )
+        if other is None:
+            return name
+
+        number = 2
+        while any(contact.name == f"{name} ({number})" for contact in self.name_index.prefix(f"{name} ({number})")):
+            number += 1
+        free_name = f"{name} ({number})"
+        if contact_id > other.id:
+            return free_name
+        self._modify_contact(other, {"name": free_name})
+        return name
+
+    @synchronized
+    def upcoming_birthdays(self, days=14, today=None):
+        """
+        Finds contacts with a birthday in the next 'days' days using the birthday index.
+
+        Parameters:
+        -----------
+        days : int, optional
+            The size of the window, today included (default is 14).
+        today : date, optional
+            The first day of the window (default is the current date).
+
+        Returns:
+        --------
+        list
+            (date, contact) tuples ordered by the date of the next birthday.
+        """
+        return self.birthday_index.upcoming(days, today)
+
+
+def _describe_ops(ops):
+    """
+    Describes the change that the given inverse operations revert,
+    e.g. "update 'anna'" or "add 250 contacts".
+    """
+    descriptions = []
+    for op in ops:
+        if op[0] == "modify":
+            descriptions.append(f"update '{op[2].get('name', op[1].name)}'")
+        else:
+            action = "add" if op[0] == "remove" else "delete"
+            contacts = op[1]
+            if len(contacts) == 1:
+                descriptions.append(f"{action} '{contacts[0].name}'")
+            else:
+                descriptions.append(f"{action} {len(contacts)} contacts")
+    if len(descriptions) == 1:
+        return descriptions[0]
+    return f"{descriptions[0]} and {len(descriptions) - 1} more change(s)"
+
+
+def _check_field_value(field, value):
+    """
+    Raises a ValueError if 'value' can't be stored in the contact field
+    'field' (the same rules as for contacts read from a file).
+    """
+    if field == "name":
+        valid = isinstance(value, str) and value.strip() != ""
+    elif field == "phones":
+        valid = isinstance(value, (list, tuple)) and all(isinstance(phone, str) for phone in value)
+    else:
+        valid = isinstance(value, (str, type(None)))
+    if not valid:
+        raise ValueError(f"Invalid value for '{field}': {value!r}.")
@@ -0,0 +1,69 @@
+"""
+This module defines the HashIndex class, a generic index that maps one or more
+keys per contact (e.g. email domain, phone number, address tokens) to the set
+of contacts having that key, so equality lookups run in O(1).
+"""
+
+from collections import defaultdict
+
+
+class HashIndex:
+    """
+    A hash index from keys to sets of contacts.
+
+    Attributes:
+    -----------
+    key_function : callable | Returns the keys of a contact (an iterable).
+    _buckets : dict         | Sets of contacts by key.
+    _keys_by_id : dict      | The indexed keys of each contact, by id(contact).
+    """
+    def __init__(self, key_function, contacts=()):
+        """
+        Initialize the index.
+
+        Parameters:
+        -----------
+        key_function : callable
+            Called with a contact, returns an iterable of keys (may be empty).
+        contacts : iterable, optional
+            Contacts to index initially.
+        """
+        self.key_function = key_function
+        self.rebuild(contacts)
+
+    def rebuild(self, contacts):
+        """Rebuilds the index from scratch."""
+        self._buckets = defaultdict(set)
+        self._keys_by_id = {}
+        for contact in contacts:
+            self.add(contact)
+
+    def add(self, contact):
+        """Adds a contact under all of its keys."""
+        keys = {key for key in self.key_function(contact) if key}
+        if not keys:
+            return
+        self._keys_by_id[id(contact)] = keys
+        for key in keys:
+            self._buckets[key].add(contact)
+
+    def remove(self, contact):
+        """Removes a contact, using the keys it was indexed with."""
+        for key in self._keys_by_id.pop(id(contact), ()):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(contact)
+                if not bucket:
+                    del self._buckets[key]
+
+    def get(self, key):
+        """Returns the set of contacts with the given key (do not modify it)."""
+        return self._buckets.get(key, set())
+
+    def count(self, key):
+        """Returns the number of contacts with the given key."""
+        return len(self._buckets.get(key, ()))
+
+    def keys(self):
+        """Returns all indexed keys."""
+        return self._buckets.keys()
@@ -0,0 +1,140 @@
+"""
+This module defines the NameIndex class, which keeps contacts sorted by name.
+Insertions and deletions use binary search, so the list never has to be
+re-sorted, and prefix queries and ordered iteration start in O(log n).
+"""
+
+from bisect import bisect_left, bisect_right
+from itertools import count
+
+
+class NameIndex:
+    """
+    A sorted index of contacts by lowercase name.
+
+    Every contact gets a unique key (lowercase name, sequence number), so
+    contacts with equal names keep a stable order and a key can be used as a
+    pagination cursor.
+
+    Attributes:
+    -----------
+    _keys : list        | Sorted (name, sequence) keys.
+    _contacts : list    | Contacts, parallel to _keys.
+    _key_by_id : dict   | The indexed key of each contact, by id(contact).
+    """
+    def __init__(self, contacts=()):
+        """Initialize the index with the given contacts."""
+        self._sequence = count()
+        self.rebuild(contacts)
+
+    def _make_key(self, contact):
+        """Creates a new unique key for a contact."""
+        return (contact.name.lower(), next(self._sequence))
+
+    def rebuild(self, contacts):
+        """Rebuilds the index from scratch with a single sort."""
+        entries = sorted(
+            ((self._make_key(contact), contact) for contact in contacts),
+            key=lambda entry: entry[0]
+        )
+        self._keys = [key for key, _ in entries]
+        self._contacts = [contact for _, contact in entries]
+        self._key_by_id = {id(contact): key for key, contact in entries}
+
+    def add(self, contact):
+        """Inserts a contact at its sorted position."""
+        key = self._make_key(contact)
+        position = bisect_right(self._keys, key)
+        self._keys.insert(position, key)
+        self._contacts.insert(position, contact)
+        self._key_by_id[id(contact)] = key
+
+    def remove(self, contact):
+        """Removes a contact, using the key it was indexed with."""
+        key = self._key_by_id.pop(id(contact), None)
+        if key is None:
+            return
+        position = bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+            del self._contacts[position]
+
+    def __len__(self):
+        """Returns the number of indexed contacts."""
+        return len(self._keys)
+
+    def __iter__(self):
+        """Iterates over all contacts in alphabetical order."""
+        return self.iter_from()
+
+    def prefix(self, prefix):
+        """
+        Returns the contacts whose name starts with 'prefix' (case-insensitive).
+
+        Parameters:
+        -----------
+        prefix : str
+            The beginning of the name.
+
+        Returns:
+        --------
+        list
+            The matching contacts in alphabetical order.
+        """
+        low, high = self._prefix_bounds(prefix)
+        return self._contacts[low:high]
+
+    def count_prefix(self, prefix):
+        """Returns the number of contacts whose name starts with 'prefix', in O(log n)."""
+        low, high = self._prefix_bounds(prefix)
+        return high - low
+
+    def _prefix_bounds(self, prefix):
+        """Returns the positions of the first and after the last name starting with 'prefix'."""
+        prefix = prefix.lower()
+        low = bisect_left(self._keys, (prefix,))
+        high = bisect_left(self._keys, (prefix + "\uffff",))
+        return low, high
+
+    def iter_from(self, name=""):
+        """
+        Iterates over the contacts in alphabetical order, starting at the first
+        name that is equal to or greater than 'name'.
+
+        Parameters:
+        -----------
+        name : str, optional
+            The name to start from (default is the beginning).
+
+        Yields:
+        -------
+        Contact
+        """
+        position = bisect_left(self._keys, (name.lower(),))
+        while position < len(self._keys):
+            key = self._keys[position]
+            yield self._contacts[position]
+            # Resume after the last key, so the index may change while iterating
+            position = bisect_right(self._keys, key)
+
+    def page(self, cursor=None, limit=20):
+        """
+        Returns one page of contacts in alphabetical order.
+
+        Parameters:
+        -----------
+        cursor : tuple, optional
+            The cursor returned with the previous page (default is the first page).
+        limit : int, optional
+            The maximum number of contacts per page (default is 20).
+
+        Returns:
+        --------
+        tuple
+            (contacts, next_cursor). next_cursor is None on the last page.
+        """
+        start = 0 if cursor is None else bisect_right(self._keys, cursor)
+        end = start + limit
+        contacts = self._contacts[start:end]
+        next_cursor = self._keys[end - 1] if end < len(self._keys) else None
+        return contacts, next_cursor
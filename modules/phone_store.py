@@ -0,0 +1,376 @@
+"""
+This module defines the PhoneStore class, which keeps every distinct phone
+number once, and the PhoneList class, the list of phone numbers of a contact.
+
+A list of strings costs about 60 bytes per number. The store keeps every
+distinct normalized number (see normalize_phone) once, packed into arrays:
+the digits as one integer and the number of digits together with a flag for
+a leading '+'. "+49 211 123", "+49211123" and "+49-211-123" share one packed
+number. The numbers are found through an open-addressing hash table of
+array positions, so a number costs about 17 bytes and no Python objects.
+
+The spelling as entered is kept as a pattern: the number with every digit
+replaced by a placeholder, e.g. "+## ### ###". A book has only a few
+patterns, and the spelling is rebuilt from the pattern and the digits, so
+contacts are saved exactly as they were entered.
+
+A contact holds one packed 64-bit value per phone (number and pattern) in a
+bytes object. Index lookups use the packed form instead of a regex, and the
+formatted numbers of recently displayed spellings are memoized.
+
+A store only grows, so phones in the undo history stay valid. Every
+ContactManager has its own store, which is freed with the manager (e.g.
+when the AddressBookRegistry unloads a book). Contacts created outside a
+ContactManager share a default store, freed with the last such contact.
+"""
+
+import functools
+import sys
+import threading
+import weakref
+from array import array
+from collections.abc import MutableSequence
+import utils.helper_functions as hf
+
+
+# Digits that always fit into an unsigned 64-bit integer
+_MAX_PACKED_DIGITS = 19
+# Flag in the length byte for a leading '+'
+_PLUS = 0x80
+# Length byte of numbers too long to be packed
+_UNPACKED = 0x7F
+# Bytes per packed phone
+_PHONE_SIZE = array("Q").itemsize
+# Pattern of a spelling that equals the normalized number
+_NORMALIZED = 0
+# Pattern of a spelling kept as a string (see PhoneStore._raw)
+_RAW = 0xFFFF
+# Bits of the pattern in a packed phone
+_PATTERN_BITS = 16
+# Stands for a digit in a pattern
+_PLACEHOLDER = "\0"
+# Replaces every digit by the placeholder
+_TO_PLACEHOLDER = str.maketrans(dict.fromkeys("0123456789", _PLACEHOLDER))
+# Multiplier of the hash function (Fibonacci hashing)
+_GOLDEN = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+
+
+def _normalize(phone):
+    """Normalizes a phone number, skipping the regex for numbers that are already normalized."""
+    digits = phone[1:] if phone.startswith("+") else phone
+    if digits.isascii() and digits.isdigit():
+        return phone
+    return hf.normalize_phone(phone)
+
+
+@functools.lru_cache(maxsize=4096)
+def _format(phone):
+    """Formats a number for display (see format_phone_number), memoized."""
+    return hf.format_phone_number(phone)
+
+
+class PhoneStore:
+    """
+    Interned, packed storage of phone numbers.
+
+    A packed phone (see PhoneList) combines the position of a normalized
+    number (upper bits) with the pattern of its spelling (lower 16 bits).
+
+    Attributes:
+    -----------
+    _table : array      | Hash table of number positions + 1 (0 marks a free slot),
+                        | its size a power of two.
+    _digits : array     | The digits of every number as an integer.
+    _lengths : array    | The number of digits of every number, +0x80 for a leading '+'.
+    _unpacked : dict    | Numbers with more than 19 digits, by position.
+    _patterns : list    | The parts between the digits of every pattern.
+    _pattern_ids : dict | The id of every pattern.
+    _raw : list         | Spellings that can't be kept as a pattern.
+    _raw_ids : dict     | The position of every such spelling.
+    """
+    def __init__(self):
+        """Initialize an empty store."""
+        self._table = array("I", bytes(4 * 64))
+        self._shift = 64 - 6  # Turns a 64-bit hash into a slot of the table
+        self._digits = array("Q")
+        self._lengths = array("B")
+        self._unpacked = {}
+        self._patterns = [None]  # Id 0 is the normalized spelling
+        self._pattern_ids = {}
+        self._raw = []
+        self._raw_ids = {}
+        self._lock = threading.Lock()  # Held while a number or pattern is added
+
+    def intern(self, phone):
+        """
+        Returns the packed form of a phone number, adding it to the store if needed.
+
+        Parameters:
+        -----------
+        phone : str
+            The phone number as entered.
+
+        Returns:
+        --------
+        int
+            The packed phone.
+        """
+        normalized = _normalize(phone)
+        with self._lock:
+            if phone == normalized:
+                pattern = _NORMALIZED
+            else:
+                pattern = self._pattern(phone)
+                if pattern == _RAW:
+                    raw = self._raw_ids.get(phone)
+                    if raw is None:
+                        raw = self._raw_ids[phone] = len(self._raw)
+                        self._raw.append(phone)
+                    return raw << _PATTERN_BITS | _RAW
+            return self._number(normalized) << _PATTERN_BITS | pattern
+
+    def _pattern(self, phone):
+        """Returns the id of the pattern of a spelling, or _RAW if it can't have one."""
+        if _PLACEHOLDER in phone:
+            return _RAW
+        pattern = phone.translate(_TO_PLACEHOLDER)
+        pattern_id = self._pattern_ids.get(pattern)
+        if pattern_id is None:
+            if len(self._patterns) >= _RAW:
+                return _RAW
+            pattern_id = self._pattern_ids[pattern] = len(self._patterns)
+            self._patterns.append(pattern.split(_PLACEHOLDER))
+        return pattern_id
+
+    def _number(self, normalized):
+        """Returns the position of a normalized number, packing it if it is new."""
+        plus = _PLUS if normalized.startswith("+") else 0
+        digits = normalized[1:] if plus else normalized
+        if len(digits) > _MAX_PACKED_DIGITS:
+            digits, length = 0, plus | _UNPACKED
+        else:
+            digits, length = (int(digits) if digits else 0), plus | len(digits)
+
+        # Probe the hash table (Fibonacci hashing, linear probing)
+        table, lengths, packed = self._table, self._lengths, self._digits
+        mask = len(table) - 1
+        key = hash(normalized) if length & ~_PLUS == _UNPACKED else digits << 8 | length
+        slot = ((key * _GOLDEN) & _MASK64) >> self._shift
+        while True:
+            number = table[slot]
+            if not number:
+                break
+            number -= 1
+            if lengths[number] == length and (
+                packed[number] == digits if length & ~_PLUS != _UNPACKED
+                else self._unpacked[number] == normalized
+            ):
+                return number
+            slot = (slot + 1) & mask
+
+        number = len(lengths)
+        packed.append(digits)
+        lengths.append(length)
+        if length & ~_PLUS == _UNPACKED:
+            self._unpacked[number] = normalized
+        table[slot] = number + 1
+        if 3 * len(lengths) > 2 * len(table):
+            self._grow()
+        return number
+
+    def _grow(self):
+        """Enlarges the hash table fourfold and inserts all numbers again."""
+        table = self._table = array("I", bytes(4 * 4 * len(self._table)))
+        mask = len(table) - 1
+        self._shift = 64 - mask.bit_length()
+        for number, (digits, length) in enumerate(zip(self._digits, self._lengths)):
+            key = hash(self._unpacked[number]) if length & ~_PLUS == _UNPACKED else digits << 8 | length
+            slot = ((key * _GOLDEN) & _MASK64) >> self._shift
+            while table[slot]:
+                slot = (slot + 1) & mask
+            table[slot] = number + 1
+
+    def normalized(self, phone):
+        """Returns a packed phone without separators (see normalize_phone), without a regex."""
+        if phone & _RAW == _RAW:
+            return hf.normalize_phone(self._raw[phone >> _PATTERN_BITS])
+        number = phone >> _PATTERN_BITS
+        length = self._lengths[number]
+        if length & ~_PLUS == _UNPACKED:
+            return self._unpacked[number]
+        digits = str(self._digits[number]).zfill(length & ~_PLUS) if length & ~_PLUS else ""
+        return "+" + digits if length & _PLUS else digits
+
+    def phone(self, phone):
+        """Returns a packed phone as it was entered."""
+        pattern = phone & _RAW
+        if pattern == _RAW:
+            return self._raw[phone >> _PATTERN_BITS]
+        normalized = self.normalized(phone)
+        if pattern == _NORMALIZED:
+            return normalized
+        parts = self._patterns[pattern]
+        digits = normalized.lstrip("+")
+        return parts[0] + "".join(digit + part for digit, part in zip(digits, parts[1:]))
+
+    def formatted(self, phone):
+        """Returns a packed phone formatted for display (see format_phone_number)."""
+        return _format(self.phone(phone))
+
+    def __len__(self):
+        """Returns the number of distinct normalized numbers."""
+        return len(self._lengths)
+
+    def size_bytes(self):
+        """Estimates the memory used by the store in bytes."""
+        return (
+            sys.getsizeof(self._table) + sys.getsizeof(self._digits)
+            + sys.getsizeof(self._lengths) + sys.getsizeof(self._unpacked)
+            + sum(sys.getsizeof(number) for number in self._unpacked.values())
+            + sys.getsizeof(self._pattern_ids) + sys.getsizeof(self._patterns)
+            + sum(sys.getsizeof(pattern) for pattern in self._pattern_ids)
+            + sys.getsizeof(self._raw) + sys.getsizeof(self._raw_ids)
+            + sum(sys.getsizeof(phone) for phone in self._raw)
+        )
+
+
+_default_store = None  # Weak reference to the store of contacts outside a ContactManager
+
+
+def default_phone_store():
+    """
+    Returns the store of contacts created outside a ContactManager (e.g. by
+    an importer). It is shared while such contacts exist and freed with the
+    last one; a ContactManager moves the contacts it takes into its own store.
+    """
+    global _default_store
+    store = _default_store() if _default_store is not None else None
+    if store is None:
+        store = PhoneStore()
+        _default_store = weakref.ref(store)
+    return store
+
+
+class PhoneList(MutableSequence):
+    """
+    The phone numbers of a contact: a live list view of the contact's
+    packed phones (see PhoneStore), which the contact keeps as unsigned
+    64-bit integers in a bytes object.
+
+    It supports the list operations (indexing, slicing, len, in, ==, +,
+    append, extend, insert, remove, pop, sort, reverse, copy), and changing
+    it marks the contact as modified. Like a dictionary view it always shows
+    the contact's current phones; copy() or list(contact.phones) returns a
+    list. It is not a list subclass, so isinstance(phones, list) is False and
+    json.dumps needs a list (as in Contact.to_dict).
+    """
+    __slots__ = ("_contact",)
+
+    def __init__(self, contact):
+        """
+        Parameters:
+        -----------
+        contact : Contact
+            The contact whose phones these are.
+        """
+        self._contact = contact
+
+    @property
+    def _store(self):
+        """The store the packed phones belong to."""
+        return self._contact.phone_store
+
+    @property
+    def _refs(self):
+        """The packed phones as bytes (see pack_refs)."""
+        return self._contact._phone_refs
+
+    def _ids(self):
+        """Returns the packed phones as a sequence of integers."""
+        return memoryview(self._refs).cast("Q")
+
+    def _replace(self, ids):
+        """Stores changed phones and marks the contact as modified."""
+        self._contact._phone_refs = ids.tobytes()
+        self._contact._json_cache = None
+
+    def _mutable_ids(self):
+        """Returns a copy of the packed phones that can be changed."""
+        ids = array("Q")
+        ids.frombytes(self._refs)
+        return ids
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._store.phone(ref) for ref in self._ids()[index]]
+        return self._store.phone(self._ids()[index])
+
+    def __setitem__(self, index, value):
+        ids = self._mutable_ids()
+        if isinstance(index, slice):
+            ids[index] = array("Q", [self._store.intern(phone) for phone in value])
+        else:
+            ids[index] = self._store.intern(value)
+        self._replace(ids)
+
+    def __delitem__(self, index):
+        ids = self._mutable_ids()
+        del ids[index]
+        self._replace(ids)
+
+    def __len__(self):
+        return len(self._refs) // _PHONE_SIZE
+
+    def __iter__(self):
+        phone = self._store.phone
+        return (phone(ref) for ref in self._ids())
+
+    def insert(self, index, value):
+        ids = self._mutable_ids()
+        ids.insert(index, self._store.intern(value))
+        self._replace(ids)
+
+    def __eq__(self, other):
+        if isinstance(other, PhoneList):
+            if other._store is self._store:
+                return self._refs == other._refs
+            return list(self) == list(other)
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def copy(self):
+        """Returns the numbers as a new list."""
+        return list(self)
+
+    def sort(self, key=None, reverse=False):
+        """Sorts the numbers in place, like list.sort."""
+        phones = sorted(self, key=key, reverse=reverse)
+        self._replace(array("Q", [self._store.intern(phone) for phone in phones]))
+
+    def normalized(self):
+        """Returns the numbers without separators (see normalize_phone)."""
+        normalized = self._store.normalized
+        return [normalized(ref) for ref in self._ids()]
+
+    def formatted(self):
+        """Returns the numbers formatted for display (see format_phone_number)."""
+        formatted = self._store.formatted
+        return [formatted(ref) for ref in self._ids()]
+
+
+def pack_refs(store, phones):
+    """Interns phone numbers and returns them packed into bytes (see PhoneList)."""
+    return array("Q", [store.intern(phone) for phone in phones]).tobytes()
@@ -0,0 +1,362 @@
+"""
+This module provides a small query engine over all contact fields.
+
+A query is a list of conditions combined with AND, e.g.
+"email_domain = company.de AND city = neuss AND phone_count > 1".
+The planner looks up every condition that an index can answer, starts with
+the most selective one and intersects the candidate sets. Only the remaining
+(residual) conditions are evaluated contact by contact.
+"""
+
+import re
+from collections import namedtuple
+from modules.birthday_index import parse_birthday
+import utils.helper_functions as hf
+
+
+# A single condition, e.g. Condition("phone_count", ">", 1)
+Condition = namedtuple("Condition", ["field", "op", "value"])
+
+OPERATORS = ("=", "!=", ">", ">=", "<", "<=", "contains", "startswith")
+
+# An index lookup is only worth it if its result is at most this many times
+# larger than the current candidate set; otherwise the condition is evaluated
+# on the candidates instead.
+INTERSECT_FACTOR = 4
+
+
+def email_domain(email):
+    """Returns the lowercase domain of an email address, or "" if there is none."""
+    if not email or "@" not in email:
+        return ""
+    return email.rsplit("@", 1)[1].strip().lower()
+
+
+def address_tokens(address):
+    """Splits an address into lowercase word tokens, e.g. ["kirchstr", "9", "41450", "neuss"]."""
+    return re.findall(r"\w+", (address or "").lower())
+
+
+def birthday_key_string(birthday):
+    """Returns a birthday as "DD.MM." (year dropped), or "" if it can't be parsed."""
+    key = parse_birthday(birthday)
+    return f"{key[1]:02d}.{key[0]:02d}." if key else ""
+
+
+def birthday_month(birthday):
+    """Returns the month of a birthday, or None if it can't be parsed."""
+    key = parse_birthday(birthday)
+    return key[0] if key else None
+
+
+# How to read each queryable field from a contact. List values match if any
+# element matches.
+FIELD_GETTERS = {
+    "name": lambda contact: contact.name.lower(),
+    "email": lambda contact: (contact.email or "").lower(),
+    "email_domain": lambda contact: email_domain(contact.email),
+    "phone": lambda contact: contact.phones.normalized(),
+    "phone_count": lambda contact: len(contact.phones),
+    "address": lambda contact: (contact.address or "").lower(),
+    "address_token": lambda contact: address_tokens(contact.address),
+    "street": lambda contact: contact.address_parts["street"].lower(),
+    "postal_code": lambda contact: contact.address_parts["postal_code"],
+    "city": lambda contact: contact.address_parts["city"].lower(),
+    "birthday": lambda contact: birthday_key_string(contact.birthday),
+    "birthday_month": lambda contact: birthday_month(contact.birthday),
+}
+
+NUMERIC_FIELDS = ("phone_count", "birthday_month")
+
+
+def normalize_value(field, value):
+    """
+    Converts a condition value to the representation used by FIELD_GETTERS.
+
+    Raises:
+    -------
+    ValueError
+        If the value is invalid for the field.
+    """
+    if field in NUMERIC_FIELDS:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"'{field}' needs a number, got '{value}'.")
+    value = str(value).strip()
+    if field == "phone":
+        return hf.normalize_phone(value)
+    if field == "birthday":
+        normalized = birthday_key_string(value)
+        if not normalized:
+            raise ValueError(f"Invalid birthday '{value}', use DD.MM.")
+        return normalized
+    return value.lower()
+
+
+def make_condition(field, op, value):
+    """
+    Creates a validated Condition with a normalized value.
+
+    Raises:
+    -------
+    ValueError
+        If the field or operator is unknown or the value is invalid.
+    """
+    if field not in FIELD_GETTERS:
+        raise ValueError(f"Unknown field '{field}'. Available: {', '.join(FIELD_GETTERS)}.")
+    if op not in OPERATORS:
+        raise ValueError(f"Unknown operator '{op}'. Available: {', '.join(OPERATORS)}.")
+    return Condition(field, op, normalize_value(field, value))
+
+
+def parse_query(text):
+    """
+    Parses a query like "email_domain = company.de AND phone_count > 1".
+
+    Parameters:
+    -----------
+    text : str
+        Conditions "field operator value" separated by "AND".
+
+    Returns:
+    --------
+    list
+        The Condition objects.
+
+    Raises:
+    -------
+    ValueError
+        If a condition can't be parsed.
+    """
+    conditions = []
+    for clause in re.split(r"\s+and\s+", text.strip(), flags=re.IGNORECASE):
+        match = re.match(
+            r"^\s*(\w+)\s*(>=|<=|!=|=|>|<|\bcontains\b|\bstartswith\b)\s*(.*?)\s*$",
+            clause,
+            flags=re.IGNORECASE
+        )
+        if not match or not match.group(3):
+            raise ValueError(f"Invalid condition '{clause.strip()}'. Use: field operator value.")
+        field, op, value = match.group(1).lower(), match.group(2).lower(), match.group(3)
+        conditions.append(make_condition(field, op, value.strip("'\"")))
+    return conditions
+
+
+def _compare(actual, op, expected):
+    """Compares a single field value with a condition value."""
+    if actual is None or actual == "":
+        return op == "!=" and expected not in (None, "")
+    if op == "=":
+        return actual == expected
+    if op == "!=":
+        return actual != expected
+    if op == "contains":
+        return str(expected) in str(actual)
+    if op == "startswith":
+        return str(actual).startswith(str(expected))
+    try:
+        if op == ">":
+            return actual > expected
+        if op == ">=":
+            return actual >= expected
+        if op == "<":
+            return actual < expected
+        if op == "<=":
+            return actual <= expected
+    except TypeError:
+        return False
+    return False
+
+
+def evaluate(condition, contact):
+    """Returns True if the contact satisfies the condition."""
+    actual = FIELD_GETTERS[condition.field](contact)
+    if isinstance(actual, list):
+        if condition.op == "!=":
+            return all(_compare(value, "!=", condition.value) for value in actual)
+        return any(_compare(value, condition.op, condition.value) for value in actual)
+    return _compare(actual, condition.op, condition.value)
+
+
+class NameIndexAccess:
+    """Answers name "=" and "startswith" conditions with the sorted name index."""
+    operators = ("=", "startswith")
+
+    def __init__(self, name_index):
+        self.name_index = name_index
+
+    def estimate(self, condition):
+        """Returns the number of contacts the lookup will return (at most)."""
+        return self.name_index.count_prefix(condition.value)
+
+    def lookup(self, condition):
+        """Returns the set of contacts matching the condition."""
+        contacts = self.name_index.prefix(condition.value)
+        if condition.op == "=":
+            return {contact for contact in contacts if contact.name.lower() == condition.value}
+        return set(contacts)
+
+
+class HashIndexAccess:
+    """
+    Answers "=" conditions with a HashIndex. With 'prefix=True' it also answers
+    "startswith" by scanning the distinct keys (e.g. postal code regions).
+    """
+    def __init__(self, hash_index, prefix=False):
+        self.hash_index = hash_index
+        self.operators = ("=", "startswith") if prefix else ("=",)
+
+    def _matching_keys(self, condition):
+        """Returns the index keys matching the condition."""
+        if condition.op == "=":
+            return [condition.value]
+        return [key for key in self.hash_index.keys() if key.startswith(condition.value)]
+
+    def estimate(self, condition):
+        """Returns the number of contacts the lookup will return."""
+        return sum(self.hash_index.count(key) for key in self._matching_keys(condition))
+
+    def lookup(self, condition):
+        """Returns the set of contacts matching the condition."""
+        keys = self._matching_keys(condition)
+        if len(keys) == 1:
+            return self.hash_index.get(keys[0])
+        return set().union(*(self.hash_index.get(key) for key in keys))
+
+
+class BirthdayIndexAccess:
+    """Answers birthday and birthday_month "=" conditions with the birthday index."""
+    operators = ("=",)
+
+    def __init__(self, birthday_index):
+        self.birthday_index = birthday_index
+
+    def _key_range(self, condition):
+        """Returns the (month, day) key range matching the condition."""
+        if condition.field == "birthday_month":
+            return (condition.value, 1), (condition.value, 31)
+        day, month = (int(part) for part in condition.value.strip(".").split("."))
+        return (month, day), (month, day)
+
+    def estimate(self, condition):
+        """Returns the number of contacts the lookup will return."""
+        return self.birthday_index.count_between(*self._key_range(condition))
+
+    def lookup(self, condition):
+        """Returns the set of contacts matching the condition."""
+        return set(self.birthday_index.between(*self._key_range(condition)))
+
+
+class QueryPlan:
+    """
+    The execution plan of a query.
+
+    Attributes:
+    -----------
+    index_steps : list  | (estimate, condition, index access), most selective first.
+    residual : list     | Conditions evaluated on each candidate.
+    """
+    def __init__(self, index_steps, residual):
+        self.index_steps = index_steps
+        self.residual = residual
+
+    def describe(self):
+        """Returns a one-line, human-readable description of the plan."""
+        steps = []
+        for position, (estimate, condition, _) in enumerate(self.index_steps):
+            action = "INDEX" if position == 0 else "INTERSECT"
+            steps.append(f"{action} {_format_condition(condition)} (~{estimate})")
+        if not self.index_steps:
+            steps.append("SCAN all contacts")
+        if self.residual:
+            steps.append("FILTER " + " AND ".join(_format_condition(c) for c in self.residual))
+        return " -> ".join(steps)
+
+
+def _format_condition(condition):
+    """Formats a condition as "field op value"."""
+    return f"{condition.field} {condition.op} {condition.value}"
+
+
+class QueryPlanner:
+    """
+    Plans and executes queries over a contact list and its indexes.
+    """
+    def __init__(self, get_contacts, index_access):
+        """
+        Initialize the planner.
+
+        Parameters:
+        -----------
+        get_contacts : callable
+            Returns the current list of contacts (used for full scans).
+        index_access : dict
+            Index accessors by field name (see NameIndexAccess and friends).
+        """
+        self.get_contacts = get_contacts
+        self.index_access = index_access
+
+    def plan(self, conditions):
+        """
+        Chooses which conditions are answered by indexes, most selective first.
+
+        Returns:
+        --------
+        QueryPlan
+        """
+        candidates = []
+        residual = []
+        for condition in conditions:
+            access = self.index_access.get(condition.field)
+            if access is not None and condition.op in access.operators:
+                candidates.append((access.estimate(condition), condition, access))
+            else:
+                residual.append(condition)
+
+        candidates.sort(key=lambda step: step[0])
+
+        # Intersect only with index results that are not much larger than the
+        # current candidate set; evaluate the others as residual conditions
+        index_steps = candidates[:1]
+        for step in candidates[1:]:
+            if step[0] <= INTERSECT_FACTOR * max(index_steps[0][0], 1):
+                index_steps.append(step)
+            else:
+                residual.append(step[1])
+        return QueryPlan(index_steps, residual)
+
+    def execute(self, conditions, plan=None):
+        """
+        Runs a query.
+
+        Parameters:
+        -----------
+        conditions : list
+            The Condition objects (combined with AND).
+        plan : QueryPlan, optional
+            A plan from plan() (computed if not given).
+
+        Returns:
+        --------
+        list
+            The matching contacts, sorted by name.
+        """
+        plan = plan or self.plan(conditions)
+
+        if plan.index_steps:
+            _, condition, access = plan.index_steps[0]
+            candidates = set(access.lookup(condition))
+            for _, condition, access in plan.index_steps[1:]:
+                if not candidates:
+                    break
+                candidates = candidates.intersection(access.lookup(condition))
+        else:
+            candidates = self.get_contacts()
+
+        results = [
+            contact for contact in candidates
+            if all(evaluate(condition, contact) for condition in plan.residual)
+        ]
+        results.sort(key=lambda contact: contact.name.lower())
+        return results
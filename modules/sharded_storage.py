@@ -0,0 +1,163 @@
+"""
+This module defines the ShardedStorage class, which stores contacts in N JSON
+files ("shards") instead of one monolithic file. Contacts are assigned to a
+shard by a stable hash of their name, so a save only rewrites the shards that
+changed, and loading can parse the shards in parallel.
+"""
+
+import json
+import os
+import zlib
+from modules.contact import Contact, contacts_to_json
+
+
+MANIFEST_NAME = "manifest.json"
+
+# Below this total size, starting worker processes costs more than it saves
+PARALLEL_LOAD_MIN_BYTES = 4 * 1024 * 1024
+
+
+def shard_for_name(name, shard_count):
+    """
+    Returns the shard number of a contact name.
+
+    A CRC32 of the lowercase name is used instead of hash(), because hash()
+    of strings changes between Python processes.
+    """
+    return zlib.crc32(name.lower().encode("utf-8")) % shard_count
+
+
+def _read_shard(shard_path):
+    """
+    Reads one shard file and returns its list of contact dictionaries.
+    This is a module-level function so it can run in a process pool.
+    """
+    try:
+        with open(shard_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return []
+
+
+class ShardedStorage:
+    """
+    A class to store contacts in several shard files with a manifest.
+
+    Attributes:
+    -----------
+    folder : str        | The directory holding the shards and the manifest.
+    shard_count : int   | The number of shards (fixed once the manifest exists).
+    """
+    def __init__(self, folder, shard_count=16):
+        """
+        Initialize the storage. An existing manifest determines the shard count.
+
+        Parameters:
+        -----------
+        folder : str
+            The directory holding the shards and the manifest.
+        shard_count : int, optional
+            The number of shards for a new storage (default is 16).
+        """
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        manifest = self._load_manifest()
+        self.shard_count = manifest["shard_count"] if manifest else shard_count
+        self._counts = manifest["counts"] if manifest else [0] * self.shard_count
+
+    def _shard_path(self, shard):
+        """Returns the file path of a shard."""
+        return os.path.join(self.folder, f"shard_{shard:03d}.json")
+
+    def _load_manifest(self):
+        """Loads the manifest, or returns None if there is none."""
+        try:
+            with open(os.path.join(self.folder, MANIFEST_NAME), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def _save_manifest(self):
+        """Writes the manifest atomically."""
+        manifest_path = os.path.join(self.folder, MANIFEST_NAME)
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"shard_count": self.shard_count, "counts": self._counts}, file, indent=4)
+        os.replace(tmp_path, manifest_path)
+
+    def shard_for(self, contact):
+        """Returns the shard number of a contact."""
+        return shard_for_name(contact.name, self.shard_count)
+
+    def load(self, parallel=None, phone_store=None):
+        """
+        Loads all contacts from the shards.
+
+        Parameters:
+        -----------
+        parallel : bool, optional
+            Parse the shards in a process pool. By default this is done only
+            when the shards are large enough for it to pay off.
+        phone_store : PhoneStore, optional
+            The store for the phone numbers of the contacts (see Contact).
+
+        Returns:
+        --------
+        list
+            The Contact objects, shard by shard.
+        """
+        paths = [self._shard_path(shard) for shard in range(self.shard_count)]
+        if parallel is None:
+            total_size = sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+            parallel = total_size >= PARALLEL_LOAD_MIN_BYTES
+
+        if parallel and self.shard_count > 1:
+            from concurrent.futures import ProcessPoolExecutor  # Only needed for a parallel load
+
+            with ProcessPoolExecutor() as executor:
+                shards = list(executor.map(_read_shard, paths))
+        else:
+            shards = [_read_shard(path) for path in paths]
+
+        return [Contact.from_dict(data, phone_store) for shard in shards for data in shard]
+
+    def save(self, contacts, dirty_shards=None):
+        """
+        Writes the given shards (all shards if 'dirty_shards' is None).
+
+        Parameters:
+        -----------
+        contacts : list
+            All Contact objects.
+        dirty_shards : iterable, optional
+            The numbers of the shards that changed since the last save.
+
+        Returns:
+        --------
+        int
+            The number of shard files written.
+        """
+        dirty = set(range(self.shard_count)) if dirty_shards is None else set(dirty_shards)
+        if not dirty:
+            return 0
+
+        groups = {shard: [] for shard in dirty}
+        for contact in contacts:
+            shard = self.shard_for(contact)
+            if shard in groups:
+                groups[shard].append(contact)
+
+        for shard, shard_contacts in groups.items():
+            shard_path = self._shard_path(shard)
+            tmp_path = shard_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                file.write(contacts_to_json(shard_contacts))
+            os.replace(tmp_path, shard_path)
+            self._counts[shard] = len(shard_contacts)
+
+        self._save_manifest()
+        return len(groups)
+
+    def __len__(self):
+        """Returns the number of stored contacts, according to the manifest."""
+        return sum(self._counts)
@@ -0,0 +1,221 @@
+"""
+This module provides incremental two-way synchronization between contact
+databases, e.g. copies of 'contacts.json' on several machines.
+
+Every contact has a stable id, a version and a sequence number (see Contact).
+The version is a logical (Lamport) clock value: a local change gets a version
+higher than every version the database has seen, including the ones received
+from other databases. The sequence number orders the changes of one database,
+so "all changes since sequence number X" is a cheap change feed. Deleted
+contacts leave a tombstone with the same information.
+
+When both databases changed the same contact, the change with the higher
+version wins. Equal versions are decided by a fixed rule (a deletion wins,
+then the larger encoded record), so both sides always agree on the result.
+"""
+
+import json
+import os
+from bisect import bisect_left, bisect_right
+from modules.contact import Contact
+
+
+class SequenceIndex:
+    """
+    An index of contacts ordered by the sequence number of their last change.
+    New changes get the highest sequence number, so they are appended.
+
+    Attributes:
+    -----------
+    _seqs : list        | Sorted sequence numbers.
+    _contacts : list    | Contacts, parallel to _seqs.
+    _seq_by_id : dict   | The indexed sequence number of each contact, by id(contact).
+    """
+    def __init__(self, contacts=()):
+        """Initialize the index with the given contacts."""
+        self.rebuild(contacts)
+
+    def rebuild(self, contacts):
+        """Rebuilds the index from scratch with a single sort."""
+        entries = sorted(((contact.seq, contact) for contact in contacts), key=lambda entry: entry[0])
+        self._seqs = [seq for seq, _ in entries]
+        self._contacts = [contact for _, contact in entries]
+        self._seq_by_id = {id(contact): seq for seq, contact in entries}
+
+    def add(self, contact):
+        """Adds a contact at the position of its sequence number."""
+        position = bisect_right(self._seqs, contact.seq)
+        self._seqs.insert(position, contact.seq)
+        self._contacts.insert(position, contact)
+        self._seq_by_id[id(contact)] = contact.seq
+
+    def remove(self, contact):
+        """Removes a contact, using the sequence number it was indexed with."""
+        seq = self._seq_by_id.pop(id(contact), None)
+        if seq is None:
+            return
+        position = bisect_left(self._seqs, seq)
+        while position < len(self._seqs) and self._seqs[position] == seq:
+            if self._contacts[position] is contact:
+                del self._seqs[position]
+                del self._contacts[position]
+                return
+            position += 1
+
+    def since(self, seq):
+        """Returns the contacts changed after sequence number 'seq', in O(log n + k)."""
+        return self._contacts[bisect_right(self._seqs, seq):]
+
+
+class SyncState:
+    """
+    The synchronization state of a database, stored next to it in a JSON file.
+
+    Attributes:
+    -----------
+    sync_file : str     | The path of the state file.
+    replica : str       | A unique id of this database.
+    peers : dict        | The last sequence number pulled from each other database.
+    tombstones : dict   | {"version", "seq", "name"} of deleted contacts by contact id,
+                        | ordered by sequence number.
+    dirty : bool        | True if the state changed since it was saved.
+    """
+    def __init__(self, sync_file):
+        """
+        Loads the state, or starts a new one with a new replica id.
+
+        Parameters:
+        -----------
+        sync_file : str
+            The path of the state file. It is created on the first save.
+        """
+        self.sync_file = sync_file
+        self.replica = None
+        self.peers = {}
+        self.tombstones = {}
+        self.dirty = True
+        try:
+            with open(sync_file, "r", encoding="utf-8") as file:
+                state = json.load(file)
+            self.replica = state["replica"]
+            self.peers = state.get("peers", {})
+            self.tombstones = dict(
+                sorted(state.get("tombstones", {}).items(), key=lambda item: item[1]["seq"])
+            )
+            self.dirty = False
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+        if self.replica is None:
+            import uuid  # Loads the platform module, so only when a new id is needed
+
+            self.replica = uuid.uuid4().hex
+
+    def save(self):
+        """Writes the state atomically, if it changed."""
+        if not self.dirty:
+            return
+        tmp_path = self.sync_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(
+                {"replica": self.replica, "peers": self.peers, "tombstones": self.tombstones},
+                file, indent=4
+            )
+        os.replace(tmp_path, self.sync_file)
+        self.dirty = False
+
+    def add_tombstone(self, contact_id, version, seq, name):
+        """Records the deletion of a contact (moving it to the end of the order)."""
+        self.tombstones.pop(contact_id, None)
+        self.tombstones[contact_id] = {"version": version, "seq": seq, "name": name}
+        self.dirty = True
+
+    def discard_tombstone(self, contact_id):
+        """Forgets the deletion of a contact that exists again."""
+        if self.tombstones.pop(contact_id, None) is not None:
+            self.dirty = True
+
+    def tombstones_since(self, seq):
+        """Returns (id, tombstone) pairs recorded after sequence number 'seq', oldest first."""
+        found = []
+        for contact_id in reversed(self.tombstones):
+            tombstone = self.tombstones[contact_id]
+            if tombstone["seq"] <= seq:
+                break
+            found.append((contact_id, tombstone))
+        found.reverse()
+        return found
+
+    def peer_cursor(self, replica):
+        """Returns the last sequence number pulled from a peer (-1 if never)."""
+        return self.peers.get(replica, -1)
+
+    def set_peer_cursor(self, replica, seq):
+        """Remembers the last sequence number pulled from a peer."""
+        if self.peers.get(replica) != seq:
+            self.peers[replica] = seq
+            self.dirty = True
+
+    def max_values(self):
+        """Returns the highest (version, seq) of all tombstones."""
+        versions = [tombstone["version"] for tombstone in self.tombstones.values()]
+        seqs = [tombstone["seq"] for tombstone in self.tombstones.values()]
+        return max(versions, default=0), max(seqs, default=0)
+
+
+def record_key(data):
+    """
+    Returns the conflict resolution key of a record dictionary: the version,
+    then the encoded fields, so equal versions are decided the same way on
+    every database.
+    """
+    fields = {field: data.get(field) for field in Contact.FIELDS}
+    return (data["version"], 0, json.dumps(fields, sort_keys=True))
+
+
+def tombstone_key(tombstone):
+    """Returns the conflict resolution key of a tombstone (deletions win ties)."""
+    return (tombstone["version"], 1, "")
+
+
+def pull(target, source):
+    """
+    Applies the changes of 'source' made since the last pull to 'target'
+    and saves 'target'.
+
+    Parameters:
+    -----------
+    target : ContactManager
+        The database receiving the changes.
+    source : ContactManager
+        The database sending its change feed.
+
+    Returns:
+    --------
+    int
+        The number of applied changes.
+    """
+    replica = source.sync_state.replica
+    changes = source.changes_since(target.sync_state.peer_cursor(replica))
+    applied = target.apply_changes(changes)
+    target.sync_state.set_peer_cursor(replica, changes["seq"])
+    if applied:
+        target.save_contacts()
+    else:
+        target.sync_state.save()
+    # Keep the replica id of the source, which the cursor refers to
+    source.sync_state.save()
+    return applied
+
+
+def sync(first, second):
+    """
+    Synchronizes two databases in both directions.
+
+    Returns:
+    --------
+    tuple
+        (changes applied to 'first', changes applied to 'second').
+    """
+    pulled = pull(first, second)
+    pushed = pull(second, first)
+    return pulled, pushed
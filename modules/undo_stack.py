@@ -0,0 +1,155 @@
+"""
+This module defines the UndoStack class, a bounded undo/redo history of
+contact changes. Instead of snapshots of the whole contact list, each step
+stores the inverse operations of a change: the previous values of only the
+fields that changed, or references to the added or deleted contacts. The
+size of a step therefore depends on the change, not on the number of
+contacts.
+
+The operations are tuples:
+("modify", contact, {field: previous value}) | Sets the fields back.
+("remove", [contacts])                       | Removes added contacts.
+("insert", [contacts])                       | Inserts deleted contacts again.
+"""
+
+import sys
+from collections import deque
+
+
+def estimate_size(value):
+    """
+    Estimates the memory used by a value in bytes, following lists, tuples,
+    dicts and the fields of Contact objects.
+    """
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(key) + estimate_size(item) for key, item in value.items()
+        )
+    if hasattr(value, "to_dict"):
+        return sys.getsizeof(value) + estimate_size(value.to_dict())
+    return sys.getsizeof(value)
+
+
+def estimate_op_size(op):
+    """
+    Estimates the memory an operation keeps alive in bytes. Contacts that are
+    still in the contact list are only referenced, so only the previous field
+    values and deleted contacts count in full.
+    """
+    if op[0] == "modify":
+        return sys.getsizeof(op) + estimate_size(op[2])
+    if op[0] == "insert":
+        return sys.getsizeof(op) + estimate_size(op[1])
+    return sys.getsizeof(op) + sys.getsizeof(op[1])
+
+
+class UndoStep:
+    """
+    One undoable change.
+
+    Attributes:
+    -----------
+    ops : list      | Inverse operations, applied in reverse order to undo the change.
+    label : str     | A short description, e.g. "update 'anna'".
+    size : int      | The estimated memory used by the operations in bytes.
+    """
+    def __init__(self, ops, label):
+        self.ops = ops
+        self.label = label
+        self.size = sys.getsizeof(ops) + sum(estimate_op_size(op) for op in ops)
+
+
+class UndoStack:
+    """
+    A bounded undo/redo history.
+
+    The oldest steps are dropped once more than 'max_depth' steps or more than
+    'max_bytes' bytes (estimated) are stored. Recording a new step clears the
+    redo history.
+
+    Attributes:
+    -----------
+    max_depth : int     | The maximum number of undo steps.
+    max_bytes : int     | The maximum estimated memory of all steps.
+    """
+    def __init__(self, max_depth=50, max_bytes=1024 * 1024):
+        """
+        Initialize an empty history.
+
+        Parameters:
+        -----------
+        max_depth : int, optional
+            The maximum number of undo steps (default is 50).
+        max_bytes : int, optional
+            The maximum estimated memory of all steps (default is 1 MB).
+        """
+        self.max_depth = max_depth
+        self.max_bytes = max_bytes
+        self._undo = deque()
+        self._redo = []
+        self._bytes = 0
+
+    def push(self, step):
+        """
+        Records a new change. Clears the redo history.
+
+        A step larger than 'max_bytes' clears the whole history, because the
+        older steps could not be undone consistently without it.
+        """
+        self._redo.clear()
+        self._push_undo(step)
+
+    def _push_undo(self, step):
+        """Adds a step to the undo history and drops the oldest steps if needed."""
+        if step.size > self.max_bytes or self.max_depth < 1:
+            self.clear()
+            return
+        self._undo.append(step)
+        self._bytes += step.size
+        while len(self._undo) > self.max_depth or self._bytes > self.max_bytes:
+            self._bytes -= self._undo.popleft().size
+
+    def pop_undo(self):
+        """Removes and returns the most recent step, or None if there is none."""
+        if not self._undo:
+            return None
+        step = self._undo.pop()
+        self._bytes -= step.size
+        return step
+
+    def push_redo(self, step):
+        """Records the inverse of an undone step, so it can be redone."""
+        self._redo.append(step)
+
+    def pop_redo(self):
+        """Removes and returns the most recently undone step, or None."""
+        return self._redo.pop() if self._redo else None
+
+    def push_redone(self, step):
+        """Records a redone step for undo again, keeping the redo history."""
+        self._push_undo(step)
+
+    def peek_undo(self):
+        """Returns the label of the step undo() would revert, or None."""
+        return self._undo[-1].label if self._undo else None
+
+    def peek_redo(self):
+        """Returns the label of the step redo() would repeat, or None."""
+        return self._redo[-1].label if self._redo else None
+
+    def clear(self):
+        """Forgets the whole undo and redo history."""
+        self._undo.clear()
+        self._redo.clear()
+        self._bytes = 0
+
+    def __len__(self):
+        """Returns the number of undo steps."""
+        return len(self._undo)
+
+    @property
+    def size_bytes(self):
+        """The estimated memory used by the undo steps in bytes."""
+        return self._bytes
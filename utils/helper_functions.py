@@ -1,6 +1,5 @@
 import re
-import platform
-import os
+import sys
 
 
 def show_success_message(message):
@@ -158,13 +157,22 @@ def check_cancel(input_value, process):
 
 def clear_terminal():
     """
-    Clears the terminal screen based on the user's operating system.
+    Clears the terminal screen and its scrollback with ANSI escape sequences.
+
+    Writing the sequences is instantaneous, while os.system("clear") starts a
+    shell process on every call. Windows 10 and later terminals support them.
+    """
+    sys.stdout.write("\033[2J\033[3J\033[H")
+    sys.stdout.flush()
+
+
+def normalize_phone(phone):
+    """
+    Removes all characters except digits and a leading '+' from a phone number,
+    e.g. "+44 7700-900123" becomes "+447700900123".
     """
-    # Check the operating system being used
-    if platform.system() == "Windows":
-        os.system("cls")  # Windows
-    else:
-        os.system("clear")  # Linux/macOS
+    cleaned_phone = re.sub(r"[^0-9+]", "", phone)
+    return cleaned_phone[:1] + cleaned_phone[1:].replace("+", "")
 
 
 def format_phone_number(phone):
@@ -0,0 +1,440 @@
+"""
+A load test for ContactManager. Writer threads add, update, delete and back
+up contacts while reader threads search, page through and look up the same
+ContactManager through its indexes, and reader processes parse the database
+file at the same time, like a second program reading it. Everything runs on a temporary database.
+
+Afterwards the test reports the throughput and the p50/p95/p99 latency of
+every operation and checks the results:
+- lost updates: contacts whose last written state is missing from memory or
+  from the saved database,
+- corrupted files: reads of a half-written or invalid database, and backups
+  that fail verification,
+- errors: exceptions and error messages during the run.
+
+Usage (from the project folder):
+    python -m utils.load_test --writers 4 --readers 4 --reader-processes 2 --ops 200
+
+The exit code is 1 if a check fails (or a latency exceeds --max-p99-ms), so
+the load test can be used as a regression gate.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from modules.backup_manager import validate_contacts_data
+from modules.contact import Contact
+from modules.contact_manager import ContactManager
+import utils.helper_functions as hf
+
+
+# Relative frequency of the writer operations
+WRITE_MIX = {"add": 4, "update": 4, "delete": 1, "backup": 1}
+# Relative frequency of the reader operations
+READ_MIX = {
+    "search": 2, "stream": 2, "query": 1, "prefix": 1, "page": 1, "sorted": 1,
+    "city": 1, "region": 1, "city count": 1, "birthdays": 1
+}
+
+# Number of different cities of the added contacts. New cities and postal
+# codes keep being added to the address indexes while they are read.
+CITY_COUNT = 1000
+
+# Error messages are printed in red (see show_error_message)
+_ERROR_COLOR = "\033[0;91m"
+
+
+def percentile(values, fraction):
+    """
+    Returns the nearest-rank percentile of a list of numbers (0 if empty).
+
+    Parameters:
+    -----------
+    values : list
+        The measured values.
+    fraction : float
+        The percentile as a fraction, e.g. 0.95.
+    """
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(1, int(round(fraction * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _choose(rng, mix):
+    """Picks an operation name according to its relative frequency."""
+    return rng.choices(list(mix), weights=list(mix.values()))[0]
+
+
+def _timed(latencies, operation, function, *args, **kwargs):
+    """Calls a function, records its latency in seconds and returns its result."""
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    latencies.setdefault(operation, []).append(time.perf_counter() - start)
+    return result
+
+
+def run_writer(manager, writer, ops, seed, latencies, expected, deleted, errors):
+    """
+    Runs 'ops' write operations. Each writer only changes its own contacts
+    ("load-<writer>-<n>"), so the final state of every contact is known.
+
+    Parameters:
+    -----------
+    manager : ContactManager
+        The shared ContactManager.
+    writer : int
+        The number of the writer.
+    ops : int
+        The number of operations.
+    seed : int
+        The seed of the random operation mix.
+    latencies : dict
+        Receives the latencies by operation name.
+    expected : dict
+        Receives the last written notes of every existing contact by name.
+    deleted : set
+        Receives the names of deleted contacts.
+    errors : list
+        Receives a message for every failed operation.
+    """
+    rng = random.Random(seed)
+    created = 0
+    for step in range(ops):
+        mine = [name for name in expected if name.startswith(f"load-{writer}-")]
+        operation = _choose(rng, WRITE_MIX) if mine else "add"
+        try:
+            if operation == "add":
+                name = f"load-{writer}-{created}"
+                created += 1
+                place = rng.randrange(CITY_COUNT)
+                _timed(
+                    latencies, operation, manager.add_contact,
+                    name, [f"+49170{writer:03d}{created:05d}"], email=f"{name}@load.test",
+                    address=f"Teststr. {created}, {40000 + place} Stadt{place}",
+                    birthday=f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.1990"
+                )
+                expected[name] = None
+            elif operation == "update":
+                name = rng.choice(mine)
+                notes = f"update {step} of writer {writer}"
+                if not _timed(latencies, operation, manager.update_contact, name, new_notes=notes):
+                    errors.append(f"update: contact '{name}' not found")
+                expected[name] = notes
+            elif operation == "delete":
+                name = rng.choice(mine)
+                count = _timed(
+                    latencies, operation, manager.delete_where,
+                    lambda contact, name=name: contact.name == name
+                )
+                if count != 1:
+                    errors.append(f"delete: {count} contact(s) named '{name}' deleted")
+                del expected[name]
+                deleted.add(name)
+            else:
+                _timed(latencies, operation, manager.create_backup)
+        except Exception as e:
+            errors.append(f"{operation}: {e!r}")
+
+
+def run_reader(manager, stop, seed, latencies, errors):
+    """
+    Runs read operations until 'stop' is set and checks that every search
+    result matches the search term (an index changed while it is read
+    raises an error, which is reported).
+    """
+    rng = random.Random(seed)
+    while not stop.is_set():
+        operation = _choose(rng, READ_MIX)
+        term = f"load-{rng.randrange(10)}"
+        try:
+            if operation == "search":
+                results = _timed(latencies, operation, manager.search_contact, term)
+            elif operation == "stream":
+                results = _timed(latencies, operation, lambda: list(manager.iter_search(term, limit=20)))
+            elif operation == "prefix":
+                results = _timed(latencies, operation, manager.contacts_by_prefix, term)
+            else:
+                term = ""
+                if operation == "query":
+                    results = _timed(latencies, operation, manager.query, "email_domain = load.test")
+                elif operation == "page":
+                    results = _timed(latencies, operation, manager.contacts_page, None, 50)[0]
+                elif operation == "sorted":
+                    results = _timed(latencies, operation, lambda: list(manager.iter_contacts(limit=200)))
+                elif operation == "city":
+                    results = _timed(latencies, operation, manager.contacts_in_city, f"Stadt{rng.randrange(CITY_COUNT)}")
+                elif operation == "region":
+                    results = _timed(latencies, operation, manager.contacts_in_region, "4")
+                elif operation == "city count":
+                    results = []
+                    _timed(latencies, operation, manager.count_by_city)
+                else:
+                    results = []
+                    _timed(latencies, operation, manager.upcoming_birthdays, 60)
+            wrong = [contact.name for contact in results if term not in contact.name]
+            if wrong:
+                errors.append(f"{operation}: '{wrong[0]}' doesn't match '{term}'")
+        except Exception as e:
+            errors.append(f"{operation}: {e!r}")
+
+
+def read_database(db_name, stop, results):
+    """
+    Parses and validates the database file until 'stop' is set (runs in a
+    separate process). Puts (latencies, number of reads, corruption messages)
+    on the 'results' queue.
+    """
+    latencies = []
+    corrupted = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with open(db_name, "rb") as file:
+                problem = validate_contacts_data(json.loads(file.read().decode("utf-8")))
+        except (OSError, ValueError) as e:
+            problem = str(e)
+        latencies.append(time.perf_counter() - start)
+        if problem:
+            corrupted.append(problem)
+    results.put((latencies, len(latencies), corrupted))
+
+
+def check_contacts(contacts, expected, deleted, seeded, source):
+    """
+    Compares contacts with the expected final state.
+
+    Returns:
+    --------
+    list
+        One message per lost update.
+    """
+    problems = []
+    by_name = {}
+    for contact in contacts:
+        if contact.name in by_name:
+            problems.append(f"{source}: contact '{contact.name}' exists twice")
+        by_name[contact.name] = contact
+    for name, notes in expected.items():
+        contact = by_name.get(name)
+        if contact is None:
+            problems.append(f"{source}: contact '{name}' is missing")
+        elif contact.notes != notes:
+            problems.append(f"{source}: contact '{name}' has notes {contact.notes!r}, expected {notes!r}")
+    for name in deleted:
+        if name in by_name:
+            problems.append(f"{source}: deleted contact '{name}' exists")
+    missing_seeds = [name for name in seeded if name not in by_name]
+    if missing_seeds:
+        problems.append(f"{source}: {len(missing_seeds)} seeded contact(s) are missing")
+    return problems
+
+
+def run_load_test(
+    writers=4, readers=4, reader_processes=1, ops=100, contacts=1000, seed=0, switch_interval=0.00001
+):
+    """
+    Runs the load test on a temporary database.
+
+    Parameters:
+    -----------
+    writers : int, optional
+        The number of writer threads (default is 4).
+    readers : int, optional
+        The number of reader threads (default is 4).
+    reader_processes : int, optional
+        The number of processes reading the database file (default is 1).
+    ops : int, optional
+        The number of operations per writer (default is 100).
+    contacts : int, optional
+        The number of contacts in the database before the test (default is 1000).
+    seed : int, optional
+        The seed of the random operation mix (default is 0).
+    switch_interval : float, optional
+        The thread switch interval in seconds during the test (default is
+        0.00001). Much shorter than Python's default of 0.005, so threads
+        interleave inside short operations and races show up.
+
+    Returns:
+    --------
+    dict
+        "latencies" (seconds by operation), "duration" (seconds), "reads"
+        (file reads of the reader processes), "lost_updates", "corrupted"
+        and "errors" (lists of messages).
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        db_name = os.path.join(folder, "contacts.json")
+        backup_folder = os.path.join(folder, "backups/")
+        with open(db_name, "w", encoding="utf-8") as file:
+            file.write("[]")
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            manager = ContactManager(db_name, backup_folder, background_backups=True)
+            seeded = [f"seed-{number}" for number in range(contacts)]
+            manager.import_contacts(
+                Contact(name, [f"+49211{number:07d}"], email=f"{name}@seed.test")
+                for number, name in enumerate(seeded)
+            )
+            manager.flush()
+
+            context = multiprocessing.get_context("spawn")
+            process_stop = context.Event()
+            process_results = context.Queue()
+            processes = [
+                context.Process(target=read_database, args=(db_name, process_stop, process_results))
+                for _ in range(reader_processes)
+            ]
+            for process in processes:
+                process.start()
+
+            stop = threading.Event()
+            writer_latencies = [{} for _ in range(writers)]
+            reader_latencies = [{} for _ in range(readers)]
+            expected = [{} for _ in range(writers)]
+            deleted = [set() for _ in range(writers)]
+            errors = []
+            writer_threads = [
+                threading.Thread(target=run_writer, args=(
+                    manager, number, ops, seed * 1000 + number,
+                    writer_latencies[number], expected[number], deleted[number], errors
+                ))
+                for number in range(writers)
+            ]
+            reader_threads = [
+                threading.Thread(target=run_reader, args=(
+                    manager, stop, seed * 1000 + writers + number, reader_latencies[number], errors
+                ))
+                for number in range(readers)
+            ]
+
+            default_interval = sys.getswitchinterval()
+            sys.setswitchinterval(switch_interval)
+            try:
+                start = time.perf_counter()
+                for thread in reader_threads + writer_threads:
+                    thread.start()
+                for thread in writer_threads:
+                    thread.join()
+                manager.flush()
+                duration = time.perf_counter() - start
+                stop.set()
+                for thread in reader_threads:
+                    thread.join()
+            finally:
+                sys.setswitchinterval(default_interval)
+
+            process_stop.set()
+            reads = 0
+            corrupted = []
+            latencies = {}
+            for _ in processes:
+                file_latencies, count, problems = process_results.get()
+                latencies.setdefault("file read", []).extend(file_latencies)
+                reads += count
+                corrupted.extend(f"database read: {problem}" for problem in problems)
+            for process in processes:
+                process.join()
+
+            # The final state: in memory, in the saved file and in the backups
+            all_expected = {name: notes for part in expected for name, notes in part.items()}
+            all_deleted = set().union(*deleted)
+            lost_updates = check_contacts(manager.contacts, all_expected, all_deleted, seeded, "memory")
+            reloaded = ContactManager(db_name, backup_folder)
+            lost_updates += check_contacts(reloaded.contacts, all_expected, all_deleted, seeded, "file")
+            for result in manager.backup_manager.verify_backups():
+                if not result["ok"]:
+                    corrupted.append(f"backup {result['name']}: {result['error']}")
+            manager.close()
+
+        errors += [
+            line.replace(_ERROR_COLOR, "").replace("\033[0m", "").strip()
+            for line in output.getvalue().splitlines() if _ERROR_COLOR in line
+        ]
+        for part in writer_latencies + reader_latencies:
+            for operation, values in part.items():
+                latencies.setdefault(operation, []).extend(values)
+
+    return {
+        "latencies": latencies,
+        "duration": duration,
+        "reads": reads,
+        "lost_updates": lost_updates,
+        "corrupted": corrupted,
+        "errors": errors,
+    }
+
+
+def print_report(report, max_p99_ms=None):
+    """
+    Prints the latencies and the check results.
+
+    Returns:
+    --------
+    bool
+        True if every check passed.
+    """
+    hf.show_title("Load test")
+    print(f"{'Operation':<12} {'Count':>7} {'Ops/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    print("-" * 60)
+    slow = []
+    for operation, values in sorted(report["latencies"].items()):
+        p99 = percentile(values, 0.99) * 1000
+        print(
+            f"{operation:<12} {len(values):>7} {len(values) / report['duration']:>9.1f} "
+            f"{percentile(values, 0.50) * 1000:>9.2f} {percentile(values, 0.95) * 1000:>9.2f} {p99:>9.2f}"
+        )
+        if max_p99_ms is not None and p99 > max_p99_ms:
+            slow.append(f"{operation}: p99 {p99:.2f} ms > {max_p99_ms} ms")
+    print("-" * 60)
+    print(f"Duration: {report['duration']:.2f} s\n")
+
+    passed = True
+    for title, messages in (
+        ("Lost updates", report["lost_updates"]),
+        ("Corrupted files", report["corrupted"]),
+        ("Errors", report["errors"]),
+        ("Too slow", slow),
+    ):
+        if messages:
+            passed = False
+            hf.show_error_message(f"{title}: {len(messages)}\n  " + "\n  ".join(messages[:10]))
+        else:
+            hf.show_success_message(f"{title}: none")
+    return passed
+
+
+def main(argv=None):
+    """Runs the load test from the command line and returns the exit code."""
+    parser = argparse.ArgumentParser(description="Load test for ContactManager.")
+    parser.add_argument("--writers", type=int, default=4, help="writer threads (default 4)")
+    parser.add_argument("--readers", type=int, default=4, help="reader threads (default 4)")
+    parser.add_argument("--reader-processes", type=int, default=1, help="processes reading the file (default 1)")
+    parser.add_argument("--ops", type=int, default=100, help="operations per writer (default 100)")
+    parser.add_argument("--contacts", type=int, default=1000, help="contacts before the test (default 1000)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the operation mix (default 0)")
+    parser.add_argument(
+        "--switch-interval", type=float, default=0.00001,
+        help="thread switch interval in seconds during the test (default 0.00001)"
+    )
+    parser.add_argument("--max-p99-ms", type=float, help="fail if an operation's p99 latency is higher")
+    args = parser.parse_args(argv)
+
+    report = run_load_test(
+        writers=args.writers, readers=args.readers, reader_processes=args.reader_processes,
+        ops=args.ops, contacts=args.contacts, seed=args.seed, switch_interval=args.switch_interval
+    )
+    return 0 if print_report(report, args.max_p99_ms) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+A memory benchmark of the phone numbers of an address book. It compares the
+plain representation (a list of strings per contact, as read from the JSON
+file) with the packed PhoneStore representation (see modules/phone_store.py)
+for books in which
+- every number occurs once and is entered normalized ("+492111234567"),
+- every number occurs once and is entered formatted ("+49 211 1234567"),
+- most numbers are shared between contacts (e.g. office numbers).
+
+Usage (from the project folder):
+    python -m utils.phone_benchmark --contacts 50000 --phones 2
+
+The exit code is 1 if the store needs more memory than the plain lists in
+any of the cases, so the benchmark can be used as a regression gate.
+"""
+
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from modules.phone_store import PhoneStore, pack_refs
+import utils.helper_functions as hf
+
+
+# Number of different numbers in the shared case
+SHARED_NUMBERS = 500
+
+
+def phone_lists(case, contacts, phones):
+    """
+    Returns the JSON text of the phone lists of an address book.
+
+    Parameters:
+    -----------
+    case : str
+        "unique normalized", "unique formatted" or "shared".
+    contacts : int
+        The number of contacts.
+    phones : int
+        The number of phones per contact.
+    """
+    books = []
+    for contact in range(contacts):
+        numbers = []
+        for phone in range(phones):
+            if case == "shared":
+                number = (contact * phones + phone) % SHARED_NUMBERS
+            else:
+                number = contact * phones + phone
+            if case == "unique normalized":
+                numbers.append(f"+49211{number:07d}")
+            else:
+                numbers.append(f"+49 211 {number:07d}")
+        books.append(numbers)
+    return json.dumps(books)
+
+
+def measure(build):
+    """Returns the memory in bytes kept by the result of build()."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def run_benchmark(contacts=50000, phones=2):
+    """
+    Measures both representations for every case.
+
+    Returns:
+    --------
+    list
+        (case, plain bytes, store bytes) tuples.
+    """
+    results = []
+    for case in ("unique normalized", "unique formatted", "shared"):
+        text = phone_lists(case, contacts, phones)
+        plain = measure(lambda: json.loads(text))
+
+        def packed():
+            store = PhoneStore()
+            return store, [pack_refs(store, numbers) for numbers in json.loads(text)]
+
+        results.append((case, plain, measure(packed)))
+    return results
+
+
+def main(argv=None):
+    """Runs the benchmark from the command line and returns the exit code."""
+    parser = argparse.ArgumentParser(description="Memory benchmark of the phone numbers.")
+    parser.add_argument("--contacts", type=int, default=50000, help="contacts (default 50000)")
+    parser.add_argument("--phones", type=int, default=2, help="phones per contact (default 2)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.contacts, args.phones)
+    hf.show_title("Phone memory")
+    print(f"{'Case':<20} {'Lists':>10} {'Store':>10} {'Change':>8}")
+    ok = True
+    for case, plain, store in results:
+        print(f"{case:<20} {plain / 2**20:>6.1f} MiB {store / 2**20:>6.1f} MiB {store / plain - 1:>+8.0%}")
+        ok = ok and store <= plain
+    if not ok:
+        hf.show_error_message("The store needs more memory than the plain lists.")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())